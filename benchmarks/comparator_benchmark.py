@@ -0,0 +1,278 @@
+import argparse
+from datetime import datetime, timedelta
+from heapq import heappop
+import json
+import os
+import random
+import sys
+from comparators.bet_comparator import (
+    BetComparer,
+    timeit,
+    get_timings,
+    reset_timings,
+)
+from objects.match import Match
+from objects.match_index import MatchIndex
+from objects.bets import (
+    NormalBet,
+    BonusRules,
+    FreeBet,
+    InsuredBet,
+    ProfitBoostBet,
+    ProfitBoostRules,
+)
+
+"""
+Measures the comparator end to end on synthetic matches, N sites x M games x K markets
+python -m benchmarks.comparator_benchmark --sizes 4x100x3 6x1000x9 --save
+python -m benchmarks.comparator_benchmark --sizes 4x100x3 6x1000x9
+
+Every stage is timed with @timeit from comparators/bet_comparator.py, the fastest of repeat runs is kept
+--save writes the results as the baseline, otherwise they are compared to it and it exits with 1 if a stage regressed
+
+The baseline is local only, .benchmarks/ is gitignored since timings from one machine mean nothing on another
+Save a baseline before a change and compare after it on the same machine, --baseline points at another file
+"""
+
+BASELINE_FILE = os.path.join(".benchmarks", "comparator_baseline.json")
+
+# Moneyline, spread and total come first, any other markets are alternate lines
+MARKETS = ["moneyline", "spread", "total"]
+
+START_DATE = datetime(2022, 10, 2, 13)
+
+
+# One promotion of each bet type, called for every run so no state is carried between runs
+def make_promotions() -> dict:
+    return {
+        "NormalBet": NormalBet(
+            bet=5000, bonus=BonusRules(bonus=1.0 / 6.0, min_odds="-200")
+        ),
+        "FreeBet": FreeBet(bet=600, amount_free=600),
+        "InsuredBet": InsuredBet(bet=1000, amount_insured=1000),
+        "ProfitBoostBet": ProfitBoostBet(
+            250, profit_boost=ProfitBoostRules(250, bonus=1)
+        ),
+    }
+
+
+# "4x100x3" -> (4, 100, 3)
+def parse_size(size: str) -> tuple:
+    num_sites, num_games, num_markets = (int(x) for x in size.lower().split("x"))
+    return num_sites, num_games, num_markets
+
+
+# Two way odds as implied probabilities with the site's vig on top
+def _two_way(probability, vig) -> tuple:
+    return probability * vig, (1 - probability) * vig
+
+
+# The same games on every site with each site's odds jittered around the game's true odds
+# Returns {site: [Match]}
+def make_matches(num_sites, num_games, num_markets, seed=0) -> dict:
+    rng = random.Random(seed)
+    games = []
+    for game in range(num_games):
+        teams = [f"team {2 * game}", f"team {2 * game + 1}"]
+        date = START_DATE + timedelta(hours=game // 8)
+        # [(bet, results, true probability of the first result)]
+        markets = []
+        for market in range(num_markets):
+            bet = MARKETS[market % len(MARKETS)]
+            line = 1.5 + market // len(MARKETS)
+            if bet == "moneyline" and market >= len(MARKETS):
+                # Only one moneyline per game, the extra ones are more spreads
+                bet = "spread"
+                line += 0.5
+            if bet == "moneyline":
+                results = teams
+            elif bet == "spread":
+                results = [f"{teams[0]}-{line}", f"{teams[1]}+{line}"]
+            else:
+                results = [f"o {line + 40}", f"u {line + 40}"]
+            markets.append((bet, results, rng.uniform(0.2, 0.8)))
+        games.append((teams, date, markets))
+
+    matches = {}
+    for site_num in range(num_sites):
+        site = f"Site{site_num + 1}"
+        matches[site] = []
+        for teams, date, markets in games:
+            odds = {}
+            for bet, results, probability in markets:
+                probability = min(max(probability + rng.gauss(0, 0.03), 0.05), 0.95)
+                pair = _two_way(probability, rng.uniform(1.0, 1.06))
+                odds.setdefault(bet, {}).update(zip(results, pair))
+            matches[site].append(Match(site, "nfl", date, list(teams), odds))
+    return matches
+
+
+@timeit
+def build_index(matches: dict) -> BetComparer:
+    bet_comparer = BetComparer(match_index=MatchIndex())
+    for site_matches in matches.values():
+        bet_comparer.add_matches(site_matches)
+    return bet_comparer
+
+
+# Pops every hedge and builds its output text like run.py does
+@timeit
+def extract_results(heaps: list) -> int:
+    count = 0
+    for heap in heaps:
+        while heap:
+            str(heappop(heap)[1])
+            count += 1
+    return count
+
+
+# Runs every stage once, returns {stage: seconds}
+def _run_stages(matches, num_returned, loop=False, arbitrage=False) -> dict:
+    reset_timings()
+    stages = {}
+    bet_comparer = build_index(matches)
+    stages["index"] = get_timings()["build_index"]["total"]
+
+    # The promotions are on the first site like they would be in run.py
+    promo_matches = next(iter(matches.values()))
+    heaps = []
+    for name, bet1 in make_promotions().items():
+        reset_timings()
+        heaps.append(
+            bet_comparer._get_best_given_matches_vectorized(
+                bet1, promo_matches, num_returned=num_returned
+            )
+        )
+        stages[f"scan {name}"] = get_timings()[
+            "BetComparer._get_best_given_matches_vectorized"
+        ]["total"]
+        if loop:
+            reset_timings()
+            bet_comparer._get_best_given_matches(
+                bet1, promo_matches, num_returned=num_returned
+            )
+            stages[f"loop {name}"] = get_timings()[
+                "BetComparer._get_best_given_matches"
+            ]["total"]
+
+    if arbitrage:
+        reset_timings()
+        heaps.append(bet_comparer._get_arbitrages(num_returned=num_returned))
+        stages["arbitrage"] = get_timings()["BetComparer._get_arbitrages"]["total"]
+
+    reset_timings()
+    extract_results(heaps)
+    stages["extract"] = get_timings()["extract_results"]["total"]
+    return stages
+
+
+# The fastest time of each stage over repeat runs
+def benchmark_comparator(
+    size: str, repeat=3, seed=0, num_returned=10, loop=False, arbitrage=False
+) -> dict:
+    matches = make_matches(*parse_size(size), seed=seed)
+    best = {}
+    for _ in range(repeat):
+        for stage, seconds in _run_stages(
+            matches, num_returned, loop=loop, arbitrage=arbitrage
+        ).items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+    return best
+
+
+def load_baseline(file=BASELINE_FILE) -> dict:
+    if not os.path.exists(file):
+        return {}
+    with open(file) as fp:
+        return json.load(fp)
+
+
+def save_baseline(results: dict, file=BASELINE_FILE):
+    baseline = load_baseline(file)
+    baseline.update(results)
+    os.makedirs(os.path.dirname(file) or ".", exist_ok=True)
+    with open(file, "w") as fp:
+        json.dump(baseline, fp, indent=2, sort_keys=True)
+
+
+# Returns [(size, stage, baseline seconds, seconds)] for every stage slower than threshold x its baseline
+# Stages under min_seconds are skipped, timer noise is bigger than any regression there
+def find_regressions(results: dict, baseline: dict, threshold=1.25, min_seconds=0.001):
+    regressions = []
+    for size, stages in results.items():
+        for stage, seconds in stages.items():
+            if (before := baseline.get(size, {}).get(stage)) is None:
+                continue
+            if max(seconds, before) >= min_seconds and seconds > before * threshold:
+                regressions.append((size, stage, before, seconds))
+    return regressions
+
+
+def run(
+    sizes=("4x100x3",),
+    repeat=3,
+    seed=0,
+    num_returned=10,
+    loop=False,
+    arbitrage=False,
+    save=False,
+    threshold=1.25,
+    baseline_file=BASELINE_FILE,
+) -> int:
+    baseline = load_baseline(baseline_file)
+    results = {}
+    for size in sizes:
+        results[size] = stages = benchmark_comparator(
+            size, repeat, seed, num_returned, loop=loop, arbitrage=arbitrage
+        )
+        for stage, seconds in stages.items():
+            before = baseline.get(size, {}).get(stage)
+            compared = f" ({seconds / before:.2f}x baseline)" if before else ""
+            print(f"{size:<12} {stage:<24} {seconds:.4f}s{compared}")
+
+    if save:
+        save_baseline(results, baseline_file)
+        print(f"Saved baseline to {baseline_file}")
+        return 0
+    regressions = find_regressions(results, baseline, threshold)
+    for size, stage, before, seconds in regressions:
+        print(f"Regression: {size} {stage} took {seconds:.4f}s, baseline {before:.4f}s")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Comparator scaling on synthetic matches"
+    )
+    arg_parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["4x100x3", "6x1000x3", "6x1000x9"],
+        help="sites x games x markets",
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--num-returned", type=int, default=10)
+    arg_parser.add_argument(
+        "--loop",
+        action="store_true",
+        help="also time the non vectorized _get_best_given_matches",
+    )
+    arg_parser.add_argument("--arbitrage", action="store_true")
+    arg_parser.add_argument("--save", action="store_true")
+    arg_parser.add_argument("--threshold", type=float, default=1.25)
+    arg_parser.add_argument("--baseline", default=BASELINE_FILE)
+    args = arg_parser.parse_args()
+    sys.exit(
+        run(
+            args.sizes,
+            args.repeat,
+            args.seed,
+            args.num_returned,
+            loop=args.loop,
+            arbitrage=args.arbitrage,
+            save=args.save,
+            threshold=args.threshold,
+            baseline_file=args.baseline,
+        )
+    )
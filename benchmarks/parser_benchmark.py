@@ -0,0 +1,221 @@
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from bs4.builder import builder_registry
+from parsers.site_parser import SiteParser
+from parsers.site_1_parser import Site1Parser
+from parsers.site_3_parser import Site3Parser
+from parsers.site_4_parser import Site4Parser
+from parsers.site_5_parser import Site5Parser
+from parsers.site_6_parser import Site6Parser
+from benchmarks.synthetic_html import SITES, make_games, expected_output
+
+"""
+Measures parser throughput on synthetic pages, see benchmarks/synthetic_html.py
+python -m benchmarks.parser_benchmark --sizes 10 100 1000 10000
+
+Every site's parsed matches are compared to the expected matches for the generated games, see expected_output
+It exits with 1 if any site's output differs, python -m benchmarks.parser_benchmark --sizes 100 --repeat 1 is a quick check
+
+Site2 is not included, its selectors are written inline instead of in a schema so it cant be pointed at the synthetic pages
+"""
+
+PARSERS = {
+    "Site1": Site1Parser,
+    "Site3": Site3Parser,
+    "Site4": Site4Parser,
+    "Site5": Site5Parser,
+    "Site6": Site6Parser,
+}
+
+BACKENDS = ["lxml", "html.parser", "html5lib"]
+
+STAGES = ["read", "soup", "sections", "extract"]
+
+
+# The site's parser pointed at the synthetic page
+def make_bench_parser(site, file):
+    parser = PARSERS[site]
+    return type(
+        f"Bench{parser.__name__}", (parser,), {"file": file, "schema": SITES[site][1]}
+    )
+
+
+# The site parsers call their own convert_date_str, so the anonymized date formats are swapped out on the site's class
+@contextmanager
+def synthetic_dates(site):
+    parser = PARSERS[site]
+    date_format = SITES[site][2]
+
+    def convert_date_str(date):
+        return datetime.strptime(date, date_format).replace(minute=0)
+
+    # The anonymized regexes for "starts in X minutes" match everything
+    def _standardize_date_str(date):
+        date = SiteParser.replace_td_tmr(date)
+        date = SiteParser.append_year(date)
+        return convert_date_str(date)
+
+    patches = {"convert_date_str": staticmethod(convert_date_str)}
+    if site == "Site5":
+        patches["_standardize_date_str"] = staticmethod(_standardize_date_str)
+    originals = {name: parser.__dict__[name] for name in patches}
+    try:
+        for name, value in patches.items():
+            setattr(parser, name, value)
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(parser, name, value)
+
+
+class BenchmarkResult:
+    def __init__(
+        self, site, backend, size, matches, expected, differences, stages, peak_memory
+    ):
+        self.site = site
+        self.backend = backend
+        self.size = size
+        self.matches = matches
+        self.expected = expected
+        # Matches that are missing, extra or have different odds than expected
+        self.differences = differences
+        # {stage: seconds}
+        self.stages = stages
+        self.peak_memory = peak_memory
+
+    @property
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+    @property
+    def matches_per_second(self) -> float:
+        return self.matches / self.total if self.total else 0
+
+    def __str__(self) -> str:
+        stages = " ".join(f"{stage}={self.stages[stage]:.4f}s" for stage in STAGES)
+        return (
+            f"{self.site:<6} {self.backend:<12} {self.size:>6} games "
+            f"{self.matches:>6} matches {self.matches_per_second:>9.0f}/s "
+            f"peak={self.peak_memory / 2**20:.1f}MiB {stages}"
+        )
+
+
+def _parse_stages(parser) -> tuple:
+    stages = {}
+    start_time = time.perf_counter()
+    with open(parser.file) as fp:
+        text = fp.read()
+    stages["read"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    soup = parser.make_soup(io.StringIO(text))
+    stages["soup"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    sections = parser.schema.sections.find_all(soup)
+    stages["sections"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    matches = [match for section in sections for match in parser._parse_data(section)]
+    stages["extract"] = time.perf_counter() - start_time
+    return matches, stages
+
+
+# [(key, parsed odds, expected odds)] for every match that differs from the expected output, None if it is missing
+def compare_output(matches, expected: dict) -> list:
+    parsed = {
+        (match.category, match.date, tuple(match.teams)): match.odds
+        for match in matches
+    }
+    return [
+        (key, parsed.get(key), expected.get(key))
+        for key in sorted(parsed.keys() | expected.keys(), key=str)
+        if parsed.get(key) != expected.get(key)
+    ]
+
+
+# The fastest of repeat runs is reported, peak memory is measured in a separate run since tracemalloc slows everything down
+def benchmark_parser(
+    parser, site, backend, size, expected: dict, repeat=3
+) -> BenchmarkResult:
+    parser.html_backend = backend
+    best = None
+    for _ in range(repeat):
+        matches, stages = _parse_stages(parser)
+        if best is None or sum(stages.values()) < sum(best.values()):
+            best = stages
+
+    tracemalloc.start()
+    try:
+        _parse_stages(parser)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    differences = compare_output(matches, expected)
+    for key, parsed, expected_odds in differences:
+        logging.warning(
+            f"{site} with {backend} parsed {key} as {parsed}, expected {expected_odds}"
+        )
+    return BenchmarkResult(
+        site,
+        backend,
+        size,
+        len(matches),
+        len(expected),
+        len(differences),
+        best,
+        peak_memory,
+    )
+
+
+def run(sizes=(10, 100, 1000, 10000), sites=None, backends=None, repeat=3, seed=0):
+    backends = [
+        backend
+        for backend in (backends or BACKENDS)
+        if builder_registry.lookup(backend)
+    ]
+    today = datetime.today()
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            games = make_games(size, seed=seed, today=today)
+            for site in sites or SITES:
+                write_page, _, _ = SITES[site]
+                file = os.path.join(directory, f"{site}_{size}.html")
+                with open(file, "w") as fp:
+                    fp.write(write_page(games, today))
+                parser = make_bench_parser(site, file)
+                expected = expected_output(site, games)
+                with synthetic_dates(site):
+                    for backend in backends:
+                        result = benchmark_parser(
+                            parser, site, backend, size, expected, repeat=repeat
+                        )
+                        print(result)
+                        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Parser throughput on synthetic pages"
+    )
+    arg_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000]
+    )
+    arg_parser.add_argument("--sites", nargs="+", choices=list(SITES))
+    arg_parser.add_argument("--backends", nargs="+", choices=BACKENDS)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    results = run(args.sizes, args.sites, args.backends, args.repeat, args.seed)
+    sys.exit(1 if any(result.differences for result in results) else 0)
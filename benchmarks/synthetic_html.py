@@ -0,0 +1,424 @@
+import datetime as dt
+import random
+from parsers.selector_schema import Selector, SiteSchema, SELF
+from parsers.site_parser import SiteParser
+
+"""
+The pasted html is anonymized so the parsers cant be run on real pages.
+These pages follow the same structure as each SiteNParser's schema with made up class names,
+the schemas below point the parsers at those class names.
+
+Site2 has no page here. Its selectors are written inline in Site2Parser instead of in a schema,
+so its parser cant be pointed at made up class names without rewriting it.
+"""
+
+# {category: {team name on the page: standard name the parsers should return}}
+TEAMS = {
+    "nfl": {
+        "new york jets": "jets",
+        "buffalo bills": "bills",
+        "miami dolphins": "dolphins",
+        "new england patriots": "patriots",
+        "kansas city chiefs": "chiefs",
+        "denver broncos": "broncos",
+        "dallas cowboys": "cowboys",
+        "philadelphia eagles": "eagles",
+        "green bay packers": "packers",
+        "chicago bears": "bears",
+        "jacksonville jaguars": "jaguars",
+        "tennessee titans": "titans",
+        "seattle seahawks": "seahawks",
+        "arizona cardinals": "cardinals",
+        "detroit lions": "lions",
+        "minnesota vikings": "vikings",
+    },
+    "mlb": {
+        "boston red sox": "red sox",
+        "new york yankees": "yankees",
+        "toronto blue jays": "blue jays",
+        "tampa bay rays": "rays",
+        "chicago white sox": "white sox",
+        "san diego padres": "padres",
+        "houston astros": "astros",
+        "seattle mariners": "mariners",
+        "atlanta braves": "braves",
+        "new york mets": "mets",
+        "los angeles dodgers": "dodgers",
+        "san francisco giants": "giants",
+        "st. louis cardinals": "cardinals",
+        "milwaukee brewers": "brewers",
+        "cleveland guardians": "guardians",
+        "detroit tigers": "tigers",
+    },
+}
+
+MATCHES_PER_SECTION = 50
+
+
+# A made up game with its three lines, odds are american odds strs like the sites show
+class SyntheticGame:
+    def __init__(self, category, teams, kickoff, moneyline, spread, total) -> None:
+        self.category = category
+        self.teams = teams
+        self.kickoff = kickoff
+        # [(odds, odds)]
+        self.moneyline = moneyline
+        # [(header, odds), (header, odds)]
+        self.spread = spread
+        self.total = total
+
+
+def _american(rng: random.Random, ip):
+    return SiteParser.ip_to_american(
+        min(max(ip + rng.uniform(-0.03, 0.03), 0.05), 0.95)
+    )
+
+
+def make_games(num_games, seed=0, today: dt.datetime = None) -> list:
+    rng = random.Random(seed)
+    today = (today or dt.datetime.today()).replace(minute=0, second=0, microsecond=0)
+    games = []
+    for _ in range(num_games):
+        category = rng.choice(list(TEAMS))
+        teams = rng.sample(list(TEAMS[category]), 2)
+        # Within the week so weekday names are enough for the sites that only show those
+        kickoff = today.replace(hour=rng.randint(12, 22)) + dt.timedelta(
+            days=rng.randint(0, 6)
+        )
+        ip = rng.uniform(0.25, 0.75)
+        points = rng.choice([1.5, 2.5, 3, 3.5, 6.5, 7]) if category == "nfl" else 1.5
+        line = (
+            rng.choice([7.5, 8, 8.5, 9])
+            if category == "mlb"
+            else rng.choice([41.5, 44, 47.5])
+        )
+        games.append(
+            SyntheticGame(
+                category,
+                teams,
+                kickoff,
+                (_american(rng, ip), _american(rng, 1 - ip)),
+                [
+                    (f"+{points:g}", _american(rng, 0.5)),
+                    (f"-{points:g}", _american(rng, 0.5)),
+                ],
+                [
+                    (f"o {line:g}", _american(rng, 0.5)),
+                    (f"u {line:g}", _american(rng, 0.5)),
+                ],
+            )
+        )
+    return games
+
+
+# Splits the games into category sections the way the sites list them
+def _sections(games):
+    sections = {}
+    for game in games:
+        sections.setdefault(game.category, []).append(game)
+    for category, category_games in sections.items():
+        for idx in range(0, len(category_games), MATCHES_PER_SECTION):
+            yield category, category_games[idx : idx + MATCHES_PER_SECTION]
+
+
+def _day_name(game: SyntheticGame, today: dt.datetime):
+    delta = (game.kickoff.date() - today.date()).days
+    if delta == 0:
+        return "today"
+    if delta == 1:
+        return "tomorrow"
+    return game.kickoff.strftime("%a %b %d").lower()
+
+
+def _time(game: SyntheticGame):
+    return game.kickoff.strftime("%I:%M %p").lstrip("0").lower()
+
+
+BETS = ["spread", "total", "moneyline"]
+
+
+def _lines(game: SyntheticGame):
+    return [game.spread, game.total, [(None, odds) for odds in game.moneyline]]
+
+
+# Every 20th match in a section is live, the sites with skip_matches leave them out
+def _is_live(idx):
+    return idx % 20 == 19
+
+
+# Every 10th match in a Site5 section has its total column locked, the odds are still in the column
+def _is_locked(idx):
+    return idx % 10 == 9
+
+
+###############
+### LAYOUTS ###
+###############
+
+
+def site_1_page(games, today: dt.datetime) -> str:
+    html = []
+    for category, section in _sections(games):
+        html.append(f'<div class="section"><h2 class="category">{category}</h2>')
+        html.extend(f'<span class="bet">{bet}</span>' for bet in BETS)
+        for idx, game in enumerate(section):
+            live = '<span class="live">live</span>' if _is_live(idx) else ""
+            html.append(
+                f'<div class="match">{live}<span class="date">{game.kickoff.strftime("%a %b %d")} {_time(game)}</span>'
+                f'<div class="teams"><span>{game.teams[0]}</span><span>{game.teams[1]}</span></div>'
+            )
+            for bet, line in zip(BETS, _lines(game)):
+                html.append('<div class="col">')
+                for header, odds in line:
+                    if header:
+                        html.append(f'<span class="header">{header}</span>')
+                    html.append(f'<span class="odds">{odds}</span>')
+                html.append("</div>")
+            html.append("</div>")
+        html.append("</div>")
+    return "\n".join(html)
+
+
+def site_3_page(games, today: dt.datetime) -> str:
+    html = []
+    for category, section in _sections(games):
+        html.append(f'<section><h2 class="category">sports / {category}</h2>')
+        html.extend(f'<span class="bet">{bet}</span>' for bet in BETS)
+        for game in section:
+            time = _time(game).replace("pm", "p.m.").replace("am", "a.m.")
+            html.append(
+                f'<div class="match"><span class="date">{game.kickoff.strftime("%a")} @ {time}</span>'
+                f'<div class="teams"><span class="team">{game.teams[0]}</span><span class="team">{game.teams[1]}</span></div>'
+            )
+            for bet, line in zip(BETS, _lines(game)):
+                html.append('<div class="col">')
+                for header, odds in line:
+                    if header:
+                        html.append(f'<span class="header">{header}</span>')
+                    html.append(f'<span class="odds">{odds}</span>')
+                html.append("</div>")
+            html.append("</div>")
+        html.append("</section>")
+    return "\n".join(html)
+
+
+def site_4_page(games, today: dt.datetime) -> str:
+    html = []
+    for category, section in _sections(games):
+        html.append(f'<div class="section"><h2 class="category">{category}</h2>')
+        days = {}
+        for game in section:
+            days.setdefault(_day_name(game, today), []).append(game)
+        for day, day_games in days.items():
+            if day not in ("today", "tomorrow"):
+                day += "th"
+            html.append(f'<table class="day"><caption class="day-date">{day}</caption>')
+            html.append(
+                "<tr>"
+                + "".join(f'<th class="bet">{bet}</th>' for bet in BETS)
+                + "</tr>"
+            )
+            for game in day_games:
+                for idx, team in enumerate(game.teams):
+                    time = f'<td class="time">{_time(game)}</td>' if idx == 0 else ""
+                    html.append(f'<tr>{time}<td class="team">{team}</td>')
+                    for bet, line in zip(BETS, _lines(game)):
+                        header, odds = line[idx]
+                        if header:
+                            html.append(
+                                f'<td class="odds-col"><span class="header">{header}</span><span class="odds">{odds}</span></td>'
+                            )
+                        else:
+                            html.append(f'<td class="odds-col">{odds}</td>')
+                    html.append("</tr>")
+            html.append("</table>")
+        html.append("</div>")
+    return "\n".join(html)
+
+
+def _cells_grid(game: SyntheticGame, locked=False):
+    html = ['<div class="grid">']
+    for bet, line in zip(BETS, _lines(game)):
+        html.append('<div class="col">')
+        if locked and bet == "total":
+            html.append('<span class="locked"></span>')
+        for header, odds in line:
+            header = f'<span class="header">{header}</span>' if header else ""
+            html.append(
+                f'<div class="cell">{header}<span class="odds">{odds}</span></div>'
+            )
+        html.append("</div>")
+    html.append("</div>")
+    return html
+
+
+def site_5_page(games, today: dt.datetime) -> str:
+    html = []
+    for category, section in _sections(games):
+        html.append(f'<div class="section"><h2 class="category">{category}</h2>')
+        html.extend(f'<span class="bet">{bet}</span>' for bet in BETS)
+        for idx, game in enumerate(section):
+            day = _day_name(game, today)
+            if day not in ("today", "tomorrow"):
+                day = game.kickoff.strftime("%a %b %d")
+            html.append(
+                f'<div class="match"><span class="date">{day} {_time(game)}</span>'
+                f'<span class="team">{game.teams[0]}</span><span class="team">{game.teams[1]}</span><div class="grids">'
+            )
+            html.extend(_cells_grid(game, locked=_is_locked(idx)))
+            html.append("</div></div>")
+        html.append("</div>")
+    return "\n".join(html)
+
+
+def site_6_page(games, today: dt.datetime) -> str:
+    html = []
+    for category, section in _sections(games):
+        html.append(f'<div class="page"><h2 class="category">{category}</h2>')
+        # The live table comes first and is skipped
+        html.append('<div class="table live"><span class="bet">moneyline</span></div>')
+        html.append('<div class="table">')
+        html.extend(f'<span class="bet">{bet}</span>' for bet in BETS)
+        for game in section:
+            day = _day_name(game, today)
+            date = (
+                _time(game)
+                if day == "today"
+                else f"{game.kickoff.strftime('%a')} {_time(game)}"
+            )
+            html.append(
+                f'<div class="match"><span class="date">{date}</span>'
+                f'<span class="team">{game.teams[0]}</span><span class="team">{game.teams[1]}</span>'
+            )
+            html.extend(_cells_grid(game))
+            html.append("</div>")
+        html.append("</div></div>")
+    return "\n".join(html)
+
+
+###############
+### SCHEMAS ###
+###############
+
+SITE_1_SCHEMA = SiteSchema(
+    sections=Selector("div", class_="section"),
+    category=Selector(class_="category"),
+    bets=Selector(class_="bet"),
+    matches=Selector(class_="match"),
+    skip_matches=[Selector(class_="live")],
+    date=Selector(class_="date"),
+    teams=Selector("div", {"class": "teams"}, then=Selector("span")),
+    cols=Selector(class_="col"),
+    skip_cols=[Selector(class_="locked")],
+    odds=Selector(class_="odds"),
+    bet_headers=Selector(class_="header"),
+)
+
+SITE_3_SCHEMA = SiteSchema(
+    sections=Selector("section"),
+    category=Selector(class_="category"),
+    bets=Selector(class_="bet"),
+    matches=Selector(class_="match"),
+    require_matches=[Selector(class_="date")],
+    date=Selector(class_="date"),
+    teams=Selector("div", {"class": "teams"}, then=Selector("span", {"class": "team"})),
+    cols=Selector(class_="col"),
+    skip_empty_cols=True,
+    odds=Selector(class_="odds"),
+    bet_headers=Selector(class_="header"),
+)
+
+SITE_4_SCHEMA = SiteSchema(
+    sections=Selector("div", class_="section"),
+    category=Selector(class_="category"),
+    groups=Selector(class_="day"),
+    group_date=Selector(class_="day-date"),
+    bets=Selector(class_="bet"),
+    matches=Selector("tr"),
+    header_rows=1,
+    rows_per_match=2,
+    skip_matches=[Selector(class_="live")],
+    date=Selector(class_="time"),
+    teams=Selector(class_="team"),
+    cols=Selector("td", {"class": "odds-col"}),
+    skip_cols=[Selector(class_="locked")],
+    skipped_cols_take_bet=False,
+    moneyline_odds=SELF,
+    odds=Selector(class_="odds"),
+    bet_headers=Selector(class_="header"),
+)
+
+SITE_5_SCHEMA = SiteSchema(
+    sections=Selector("div", class_="section"),
+    category=Selector(class_="category"),
+    bets=Selector(class_="bet"),
+    matches=Selector(class_="match"),
+    skip_matches=[Selector(class_="live")],
+    date=Selector(class_="date"),
+    teams=Selector(class_="team"),
+    cols=Selector(class_="grids", then=Selector("div", then=Selector(class_="col"))),
+    skip_cols=[Selector(class_="locked")],
+    cells=Selector("div", class_="cell"),
+    skip_cells=[Selector(class_="suspended")],
+    odds=Selector(class_="odds"),
+    bet_headers=Selector(class_="header"),
+)
+
+SITE_6_SCHEMA = SiteSchema(
+    sections=Selector("div", class_="page"),
+    category=Selector("h2", class_="category"),
+    many_categories=True,
+    tables=Selector(class_="table"),
+    live_tables=Selector(class_="live"),
+    bets=Selector(class_="bet"),
+    matches=Selector(class_="match"),
+    date=Selector(class_="date"),
+    teams=Selector(class_="team"),
+    cols=Selector(class_="grid", then=Selector(class_="col")),
+    cells=Selector(class_="cell"),
+    skip_cells=[Selector(class_="suspended")],
+    odds=Selector(class_="odds"),
+    bet_headers=Selector(class_="header"),
+)
+
+# {site: (page writer, schema, date format after the site's own date cleaning)}
+SITES = {
+    "Site1": (site_1_page, SITE_1_SCHEMA, "%a %b %d %I:%M %p %Y"),
+    "Site3": (site_3_page, SITE_3_SCHEMA, "%a %b %d %I:%M %p %Y"),
+    "Site4": (site_4_page, SITE_4_SCHEMA, "%a %b %d %Y %I:%M %p"),
+    "Site5": (site_5_page, SITE_5_SCHEMA, "%a %b %d %I:%M %p %Y"),
+    "Site6": (site_6_page, SITE_6_SCHEMA, "%a %b %d %I:%M %p %Y"),
+}
+
+
+# American odds str -> implied probability, worked out here instead of with SiteParser.convert_odds so the check does not depend on it
+def _implied_probability(american: str) -> float:
+    num = int(american[1:])
+    return (100 if american[0] == "+" else num) / (num + 100)
+
+
+# The matches the site's parser should return for the generated games, {(category, date, (team, team)): odds}
+# Built from the games and TEAMS only, not with the parsing helpers, so a regression in those shows up as a difference
+# Live matches are left out, locked columns have no odds and every match of a day is kept
+# (the hand-written Site4 parser dropped the last match of each day, the schema engine does not)
+def expected_output(site, games) -> dict:
+    expected = {}
+    for category, section in _sections(games):
+        for idx, game in enumerate(section):
+            if site == "Site1" and _is_live(idx):
+                continue
+            teams = [TEAMS[category][team] for team in game.teams]
+            odds = {}
+            for bet, line in zip(BETS, _lines(game)):
+                if site == "Site5" and _is_locked(idx) and bet == "total":
+                    continue
+                for team, (header, american) in zip(teams, line):
+                    if bet == "moneyline":
+                        key = team
+                    elif bet == "spread":
+                        key = team + header
+                    else:
+                        key = header
+                    odds.setdefault(bet, {})[key] = _implied_probability(american)
+            expected[(category, game.kickoff, tuple(teams))] = odds
+    return expected
@@ -0,0 +1,84 @@
+import numpy as np
+from parsers.site_parser import SiteParser
+
+
+# A set of bets, one per outcome of a market, that wins the same amount whatever the outcome
+class Arbitrage:
+    def __init__(self, bet, match, legs, total) -> None:
+        self.bet = bet
+        # The game's key in the comparer, its site is whichever site was indexed first
+        self.match = match
+        # legs are (result, ip, match the odds are from, stake)
+        self.legs = legs
+        self.total = total
+        self.implied_probability = sum(leg[1] for leg in legs)
+        self.profit = total / self.implied_probability - total
+
+    def __lt__(self, other):
+        return self.profit < other.profit
+
+    def __str__(self) -> str:
+        # Each leg prints its own match so the site and kickoff are the ones being bet on
+        output = f"{self.bet}"
+        for result, ip, match, stake in self.legs:
+            output += f"\n{str(match)}:\n${round(stake,2)} @ {SiteParser.ip_to_american(ip)} on {result}"
+        output += f"\nProfit: {round(self.profit,2)} ({round(self.profit/self.total*100, 2)}%)"
+        return output
+
+
+# Finds every market where the best odds for each outcome (across all sites) add up to less than 1
+class ArbitrageScanner:
+    def __init__(self, bet_comparer) -> None:
+        self._bet_comparer = bet_comparer
+
+    # total is how much is spread across the legs of each arbitrage
+    def scan(self, total=100) -> list:
+        # A market is the set of results a site offers for a bet, ex. spread: {team1-1.5, team2+1.5}
+        # so only complementary lines from different sites get compared
+        markets, slots = [], {}
+        slot, ips, entries = [], [], []
+        for game, match_comparer in self._bet_comparer.match_comparers.items():
+            market_ids = {}
+            for match in match_comparer.live.values():
+                for bet, values in match.odds.items():
+                    key = (bet, frozenset(values))
+                    if key not in market_ids:
+                        market_ids[key] = len(markets)
+                        markets.append((game, bet))
+                    for result, ip in values.items():
+                        slot_key = (market_ids[key], result)
+                        if slot_key not in slots:
+                            slots[slot_key] = len(slots)
+                        slot.append(slots[slot_key])
+                        ips.append(ip)
+                        entries.append(match)
+
+        if not slots:
+            return []
+
+        # Best odds for each (market, result) slot, sorted by slot then ip so the first of each slot is the best
+        slot, ips = np.array(slot), np.array(ips, dtype=float)
+        order = np.lexsort((ips, slot))
+        first = np.flatnonzero(np.diff(slot[order], prepend=-1))
+        best = order[first]
+        slot_market = np.empty(len(slots), dtype=int)
+        for (market, _), idx in slots.items():
+            slot_market[idx] = market
+
+        # Arbitrage when the implied probabilities of every outcome add up to less than 1
+        market_ip = np.bincount(
+            slot_market[slot[best]], weights=ips[best], minlength=len(markets)
+        )
+        # A market with a single outcome is not something that can be hedged
+        market_ip[np.bincount(slot_market, minlength=len(markets)) < 2] = np.inf
+        results = {idx: result for (_, result), idx in slots.items()}
+        arbitrages = []
+        for market in np.flatnonzero(market_ip < 1):
+            legs = []
+            for idx in best[slot_market[slot[best]] == market]:
+                # Stakes are proportional to the implied probability so every outcome pays out total / market_ip
+                stake = total * ips[idx] / market_ip[market]
+                legs.append((results[slot[idx]], float(ips[idx]), entries[idx], stake))
+            game, bet = markets[market]
+            arbitrages.append(Arbitrage(bet, game, legs, total))
+        return sorted(arbitrages, reverse=True)
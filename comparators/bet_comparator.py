@@ -1,54 +1,239 @@
-from heapq import heappush
+from heapq import heappush, heappushpop, heapify
+import numpy as np
 import logging
 from objects.match import Match
+from objects.match_index import MatchIndex
 from comparators.match_comparator import MatchComparer
+from comparators.hedge_scanner import HedgeScanner
+from comparators.arbitrage_scanner import ArbitrageScanner
 from objects.bets import (
     FreeBet,
     InsuredBet,
     NormalBet,
 )
 from functools import wraps
+from concurrent.futures import ProcessPoolExecutor
 import time
 
 from parsers.site_parser import SiteParser
+from parsers.ingest import get_pool_context
+from metrics.registry import metrics
 
+# Call stats for every @timeit function {qualified name: [calls, total seconds, min seconds, max seconds]}
+# Only the running totals are kept so it can stay on in long runs, see benchmarks/comparator_benchmark.py
+timings = {}
+
+
+# @timeit records every call in timings, @timeit(log=True) also logs each call at INFO
+# When the metrics registry is enabled the calls are also recorded there under "timeit"
+def timeit(func=None, *, log=False):
+    if func is None:
+        return lambda func: timeit(func, log=log)
+    name = func.__qualname__
 
-def timeit(func):
     @wraps(func)
     def timeit_wrapper(*args, **kwargs):
         start_time = time.perf_counter()
-        result = func(*args, **kwargs)
-        end_time = time.perf_counter()
-        total_time = end_time - start_time
-        print(f"Function {func.__name__}{args} {kwargs} Took {total_time:.4f} seconds")
-        return result
+        try:
+            return func(*args, **kwargs)
+        finally:
+            total_time = time.perf_counter() - start_time
+            if (stats := timings.get(name)) is None:
+                timings[name] = [1, total_time, total_time, total_time]
+            else:
+                stats[0] += 1
+                stats[1] += total_time
+                stats[2] = min(stats[2], total_time)
+                stats[3] = max(stats[3], total_time)
+            metrics.observe("timeit", total_time, function=name)
+            if log:
+                logging.info(f"Function {name} took {total_time:.4f} seconds")
 
     return timeit_wrapper
 
 
+# Returns {qualified name: {"calls", "total", "mean", "min", "max"}} for every @timeit function called since the last reset
+def get_timings() -> dict:
+    return {
+        name: {
+            "calls": calls,
+            "total": total,
+            "mean": total / calls,
+            "min": low,
+            "max": high,
+        }
+        for name, (calls, total, low, high) in timings.items()
+    }
+
+
+def reset_timings():
+    timings.clear()
+
+
+# The comparer used by the worker processes, with fork the workers share the parent's index copy-on-write
+_worker_bet_comparer = None
+
+
+def _init_worker(bet_comparer=None, collect_metrics=False):
+    global _worker_bet_comparer
+    if bet_comparer is not None:
+        _worker_bet_comparer = bet_comparer
+    metrics.enable(collect_metrics)
+
+
+# Returns the heap and the metrics recorded for it, the parent merges them into its registry
+def _evaluate_promotion(args):
+    bet1, matches, num_returned = args
+    metrics.reset()
+    heap = _worker_bet_comparer._get_best_given_matches_vectorized(
+        bet1, matches, num_returned=num_returned
+    )
+    return heap, metrics.snapshot()
+
+
+# A hedge found by the comparer, the output text is only built when it is printed
+class HedgeResult:
+    __slots__ = (
+        "ev",
+        "bet1",
+        "bet",
+        "match",
+        "odds1",
+        "result",
+        "hedge",
+        "other_result",
+        "bet_needed",
+    )
+
+    def __init__(
+        self, ev, bet1, bet, match, odds1, result, hedge, other_result, bet_needed
+    ) -> None:
+        self.ev = ev
+        self.bet1 = bet1
+        self.bet = bet
+        self.match = match
+        self.odds1 = odds1
+        self.result = result
+        # The (ip, match) entry that is bet on to hedge
+        self.hedge = hedge
+        self.other_result = other_result
+        self.bet_needed = bet_needed
+
+    def __lt__(self, other):
+        return self.ev < other.ev
+
+    def __str__(self) -> str:
+        return BetComparer._format_hedge(
+            self.bet1,
+            self.bet,
+            self.match,
+            self.odds1,
+            self.result,
+            self.hedge,
+            self.other_result,
+            self.bet_needed,
+            self.ev,
+        )
+
+
 # Best bets given a set of matches
 class BetComparer:
-    def __init__(self, scale=100) -> None:
+    def __init__(self, scale=100, match_index: MatchIndex = None) -> None:
         self.match_comparers = {}
+        # Optional, lets sites with slightly different kickoff times be compared as the same game
+        self._match_index = match_index
+        # Matches currently indexed for each site so a site can be re-ingested on its own
+        # sites {
+        #   site: {
+        #       match: match
+        #       }
+        #   }
+        self._sites = {}
         self._scale = scale
 
     @property
     def scale(self) -> int:
         return self._scale
 
+    @property
+    def match_index(self) -> MatchIndex:
+        return self._match_index
+
+    # The key of the game in match_comparers
+    def _get_key(self, match: Match, add=False) -> Match:
+        if self.match_index is None:
+            return match
+        if add:
+            return self.match_index.canonical(match)
+        return self.match_index.find(match) or match
+
+    def get_match_comparer(self, match: Match) -> MatchComparer:
+        return self.match_comparers[self._get_key(match)]
+
+    @metrics.timed("index_insert")
     def add_match(self, match: Match):
-        if match not in self.match_comparers:
-            self.match_comparers[match] = MatchComparer()
-        self.match_comparers[match].add_match(match)
+        key = self._get_key(match, add=True)
+        if key not in self.match_comparers:
+            self.match_comparers[key] = MatchComparer()
+        self.match_comparers[key].add_match(match)
+        self._sites.setdefault(match.site, {})[match] = match
+
+    # Takes any iterable, ex. SiteParser.iter_data() so matches are indexed while the remaining sections are extracted
+    @timeit
+    def add_matches(self, matches):
+        count = 0
+        for match in matches:
+            self.add_match(match)
+            count += 1
+        return count
+
+    # Replaces the site's odds for the match, only that match comparer is touched
+    def update_match(self, match: Match):
+        self.add_match(match)
+
+    def remove_match(self, match: Match):
+        if (current := self._sites.get(match.site, {}).pop(match, None)) is None:
+            logging.error(f"Match {match} not found for {match.site}")
+            return
+        key = self._get_key(current)
+        match_comparer: MatchComparer = self.match_comparers[key]
+        match_comparer.remove_match(current)
+        if not len(match_comparer):
+            del self.match_comparers[key]
+
+    # Re-ingests a site, matches that are no longer listed are removed and every other site is left alone
+    @timeit
+    def update_site(self, site, matches: list):
+        matches = {match: match for match in matches}
+        for match in list(self._sites.get(site, {})):
+            if match not in matches:
+                self.remove_match(match)
+        for match in matches.values():
+            self.update_match(match)
+
+    # Applies the output of SiteParser.parse_changed_data, only the matches from changed sections are touched
+    @timeit
+    def update_matches(self, changed: list, removed: list = ()):
+        changed_set = set(changed)
+        for match in removed:
+            if match not in changed_set:
+                self.remove_match(match)
+        for match in changed:
+            self.update_match(match)
 
-    # @timeit
     # Finds the best [num_returned] hedges for the given matches for both sides of the match
-    def _get_best_given_matches(self, bet1, matches: list):
+    # Returns a min heap of (ev, HedgeResult), if num_returned is None every hedge is returned
+    @timeit
+    def _get_best_given_matches(self, bet1, matches: list, num_returned=None):
+        if num_returned is not None and num_returned <= 0:
+            return []
+        start_time = time.perf_counter()
+        bet_type = type(bet1).__name__
         heap_return = []
         for match in matches:
             items = match.odds.items()
             try:
-                match_comparer: MatchComparer = self.match_comparers[match]
+                match_comparer: MatchComparer = self.get_match_comparer(match)
             except KeyError:
                 logging.error(f"Match {match} not found in match_comparers")
                 items = []
@@ -64,21 +249,142 @@ class BetComparer:
                                 b2 = NormalBet(odds=x[0])
                                 sol = b2.calc_matching_bets([], [bet1])
                                 if sol:
+                                    metrics.inc("hedges_solved", bet_type=bet_type)
                                     bet_needed, payout, spent = sol
                                     ev = payout - spent
-                                    output = f"{bet}\n{str(match)}:\n${round(bet1.bet,2)} @ {SiteParser.ip_to_american(odds1)} on {result}\n{str(x[1])}:\n${round(bet_needed,2)} @ {SiteParser.ip_to_american(x[0])} on {other_result}\nProfit: {round(ev,2)}"
-                                    if type(bet1) == FreeBet:
-                                        output += f"\nEfficency: {round(round(ev,2)/round(bet1.bet,2)*100, 2)}%"
-                                        output += f"\nsolve {bet1.bet}/{odds1} - {bet1.bet} = x/{x[0]}"
-                                    elif type(bet1) == InsuredBet:
-                                        output += f"\nEfficency: {round(round(ev,2)/round(bet1.bet*.7,2)*100, 2)}%"
-
-                                        # Output that can be plugged into wolfram alpha (just to double check)
-                                        # Free API requests are very limited so I did not bother using the API
-                                        output += f"\nsolve {bet1.bet}/{odds1} = x/{x[0]} + {bet1.bet} * .7"
-                                        output += f"\n{bet_needed}/{x[0]} - {bet1.bet} - {bet_needed} + {bet1.bet} * .7"
-
-                                    heappush(heap_return, (ev, output))
+                                    # Cheap check before creating the result
+                                    if BetComparer._is_full(
+                                        heap_return, num_returned
+                                    ) and (ev <= heap_return[0][0]):
+                                        continue
+                                    output = HedgeResult(
+                                        ev,
+                                        bet1,
+                                        bet,
+                                        match,
+                                        odds1,
+                                        result,
+                                        x,
+                                        other_result,
+                                        bet_needed,
+                                    )
+                                    BetComparer._push_bounded(
+                                        heap_return, (ev, output), num_returned
+                                    )
                                 else:
                                     logging.debug(f"No match for {bet1} and {b2}")
+        metrics.observe(
+            "hedge_solve", time.perf_counter() - start_time, bet_type=bet_type
+        )
+        return heap_return
+
+    # Same as _get_best_given_matches but every hedge for a bet type is solved at once with numpy
+    @timeit
+    def _get_best_given_matches_vectorized(
+        self, bet1, matches: list, num_returned=None, best_only=False
+    ):
+        if num_returned is not None and num_returned <= 0:
+            return []
+        heap_return = []
+        bet_type = type(bet1).__name__
+        with metrics.time("hedge_solve", bet_type=bet_type):
+            scan = HedgeScanner(self).scan(bet1, matches, best_only=best_only)
+        metrics.inc("hedges_solved", len(scan), bet_type=bet_type)
+        indices = range(len(scan))
+        if num_returned is not None and num_returned < len(scan):
+            # Only the top [num_returned] ever get turned into results
+            indices = np.argpartition(-scan.ev, num_returned - 1)[:num_returned]
+        for idx in indices:
+            match, bet, odds1, result, other_result = scan.groups[scan.group[idx]]
+            ev = float(scan.ev[idx])
+            output = HedgeResult(
+                ev,
+                bet1,
+                bet,
+                match,
+                odds1,
+                result,
+                scan.hedges[idx],
+                other_result,
+                float(scan.bet_needed[idx]),
+            )
+            heap_return.append((ev, output))
+        heapify(heap_return)
+        return heap_return
+
+    # Evaluates a list of (bet, matches) promotions in worker processes, returns one heap per promotion in the same order
+    # processes=None uses every core, processes=1 runs them serially
+    @timeit
+    def _get_best_given_promotions(
+        self, promotions: list, num_returned=None, processes=None
+    ):
+        global _worker_bet_comparer
+        promotions = [(bet1, matches, num_returned) for bet1, matches in promotions]
+        if processes == 1 or len(promotions) < 2:
+            return [
+                self._get_best_given_matches_vectorized(
+                    bet1, matches, num_returned=num_returned
+                )
+                for bet1, matches, num_returned in promotions
+            ]
+
+        # Forked workers inherit the index instead of each getting a pickled copy
+        context = get_pool_context()
+        if context.get_start_method() == "fork":
+            bet_comparer, _worker_bet_comparer = None, self
+        else:
+            bet_comparer = self
+        try:
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(bet_comparer, metrics.enabled),
+            ) as pool:
+                heaps = []
+                for heap, snapshot in pool.map(_evaluate_promotion, promotions):
+                    metrics.merge(snapshot)
+                    heaps.append(heap)
+                return heaps
+        finally:
+            _worker_bet_comparer = None
+
+    # Finds pure arbitrages across every site and market, [scale] is spread across the legs of each one
+    # Returns a min heap of (profit, Arbitrage)
+    @timeit
+    def _get_arbitrages(self, num_returned=None):
+        heap_return = []
+        for arbitrage in ArbitrageScanner(self).scan(total=self.scale):
+            BetComparer._push_bounded(
+                heap_return, (arbitrage.profit, arbitrage), num_returned
+            )
         return heap_return
+
+    @staticmethod
+    def _is_full(heap, num_returned):
+        return num_returned is not None and len(heap) >= num_returned
+
+    # Keeps the [num_returned] largest items in the heap
+    @staticmethod
+    def _push_bounded(heap, item, num_returned):
+        if num_returned is None or len(heap) < num_returned:
+            heappush(heap, item)
+        elif num_returned:
+            heappushpop(heap, item)
+
+    @staticmethod
+    def _format_hedge(bet1, bet, match, odds1, result, x, other_result, bet_needed, ev):
+        output = f"{bet}\n{str(match)}:\n${round(bet1.bet,2)} @ {SiteParser.ip_to_american(odds1)} on {result}\n{str(x[1])}:\n${round(bet_needed,2)} @ {SiteParser.ip_to_american(x[0])} on {other_result}\nProfit: {round(ev,2)}"
+        if type(bet1) == FreeBet:
+            output += f"\nEfficency: {round(round(ev,2)/round(bet1.bet,2)*100, 2)}%"
+            output += f"\nsolve {bet1.bet}/{odds1} - {bet1.bet} = x/{x[0]}"
+        elif type(bet1) == InsuredBet:
+            output += f"\nEfficency: {round(round(ev,2)/round(bet1.bet*.7,2)*100, 2)}%"
+
+            # Output that can be plugged into wolfram alpha (just to double check)
+            # Free API requests are very limited so I did not bother using the API
+            output += f"\nsolve {bet1.bet}/{odds1} = x/{x[0]} + {bet1.bet} * .7"
+            output += (
+                f"\n{bet_needed}/{x[0]} - {bet1.bet} - {bet_needed} + {bet1.bet} * .7"
+            )
+        return output
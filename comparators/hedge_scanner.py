@@ -0,0 +1,97 @@
+import logging
+import numpy as np
+
+
+# Results of a scan, every array has one value per (promo side, opposing odds) pair
+class HedgeScan:
+    def __init__(self, groups, group, hedges, bet_needed, payout, spent) -> None:
+        # groups are (match, bet, odds1, result, other_result) and group maps each pair to one
+        self.groups = groups
+        self.group = group
+        # The (ip, match) entry from the MatchComparer heap used to hedge
+        self.hedges = hedges
+        self.bet_needed = bet_needed
+        self.payout = payout
+        self.spent = spent
+        self.ev = payout - spent
+
+    def __len__(self):
+        return len(self.group)
+
+
+# Vectorized version of BetComparer._get_best_given_matches
+# Instead of building a NormalBet for every candidate the odds for every (promo side, opposing site) pair are lined up into arrays
+# and the hedge for the whole slate is solved in one pass
+class HedgeScanner:
+    def __init__(self, bet_comparer) -> None:
+        self._bet_comparer = bet_comparer
+
+    # best_only only hedges against the best odds from another site, for a NormalBet hedge those are always the most profitable
+    def scan(self, bet1, matches: list, best_only=False) -> HedgeScan:
+        groups, group, promo_odds, hedge_odds, hedges = [], [], [], [], []
+        for match in matches:
+            try:
+                match_comparer = self._bet_comparer.get_match_comparer(match)
+            except KeyError:
+                logging.error(f"Match {match} not found in match_comparers")
+                continue
+            for bet, values in match.odds.items():
+                for result, odds1 in values.items():
+                    for other_result in values.keys():
+                        if result == other_result:
+                            continue
+                        if best_only:
+                            if best := match_comparer.get_best_excluding_site(
+                                match.site, bet, other_result
+                            ):
+                                group.append(np.full(1, len(groups)))
+                                groups.append((match, bet, odds1, result, other_result))
+                                promo_odds.append(np.full(1, odds1, dtype=float))
+                                hedge_odds.append(np.full(1, best[0], dtype=float))
+                                hedges.append(best)
+                            continue
+                        arrays = match_comparer.get_arrays_for_bet_result(
+                            bet, other_result
+                        )
+                        if not arrays:
+                            continue
+                        odds, sites, entries = arrays
+                        # Never hedge against the site the promo is on
+                        idx = np.flatnonzero(sites != match.site)
+                        if not len(idx):
+                            continue
+                        group.append(np.full(len(idx), len(groups)))
+                        groups.append((match, bet, odds1, result, other_result))
+                        promo_odds.append(np.full(len(idx), odds1, dtype=float))
+                        hedge_odds.append(odds[idx])
+                        hedges.extend(entries[i] for i in idx)
+
+        if not groups:
+            return HedgeScan([], np.empty(0, int), [], *(np.empty(0),) * 3)
+
+        group = np.concatenate(group)
+        promo_odds, hedge_odds = np.concatenate(promo_odds), np.concatenate(hedge_odds)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            payout, spent = HedgeScanner.calc_bet_ev(bet1, promo_odds)
+            # The hedge is a NormalBet with no bonus so it just has to pay out the same as the promo bet
+            bet_needed = payout * hedge_odds
+        spent = spent + bet_needed
+
+        # Same cases calc_matching_bets refuses to solve
+        keep = np.flatnonzero((payout != 0) & np.isfinite(bet_needed))
+        return HedgeScan(
+            groups,
+            group[keep],
+            [hedges[i] for i in keep],
+            bet_needed[keep],
+            payout[keep],
+            spent[keep],
+        )
+
+    # Vectorized calc_bet_ev, returns (payout, spent) arrays for the bet placed at each of the odds
+    # The formulas come from the bet's own EQ, see Bet.calc_bet_ev_batch
+    @staticmethod
+    def calc_bet_ev(bet1, odds):
+        if not bet1.bet:
+            raise ValueError(f"Cannot scan hedges for {bet1} without a bet amount")
+        return bet1.calc_bet_ev_batch(odds)
@@ -1,5 +1,6 @@
-from heapq import heappush, nsmallest
+from heapq import heappush, heapify, nsmallest
 import logging
+import numpy as np
 from objects.match import Match
 
 
@@ -13,44 +14,151 @@ class MatchComparer:
         #       }
         #   }
         #
+        # Numpy copies of the heaps for the hedge scanner, rebuilt lazily when a heap changes
+        self._arrays = {}
+        # The best odds and the best odds from a different site than the best for each (bet, result)
+        # best {
+        #   (bet, result): [best, best from another site]
+        #   }
+        self._best = {}
+        # The current match for each site, entries from any other match are stale and dropped lazily
+        self._live = {}
+        # (bet, result) keys with stale entries that have not been dropped yet
+        self._dirty = set()
 
     @property
     def heaps(self) -> list:
+        for key in list(self._dirty):
+            self._compact(key)
         return self._heaps
 
+    @property
+    def live(self) -> dict:
+        return self._live
+
     # @property
     # def n(self) -> int:
     #     return self._n
 
     def get_best_for_bet_result(self, site, bet, result, n=None) -> list[Match]:
-        if bet in self.heaps:
+        self._compact((bet, result))
+        if bet in self._heaps:
             if not n:
-                if not result in self.heaps[bet]:
+                if not result in self._heaps[bet]:
                     logging.error(
                         f"Result {result} not found in heaps for bet {bet} from site {site}"
                     )
                     return []
-                ls = self.heaps[bet][result]
+                ls = self._heaps[bet][result]
                 n = len(ls)
+            elif n == 1:
+                # The best odds index answers this without copying the heap
+                best = self.get_best_excluding_site(site, bet, result)
+                return [best] if best else []
             else:
                 # Will never try to get more than the heap has but tries to get a redundant one in case one of the top n is filtered out
                 ls = nsmallest(
-                    min(n + 1, len(self.heaps[bet][result])), self.heaps[bet][result]
+                    min(n + 1, len(self._heaps[bet][result])), self._heaps[bet][result]
                 )
             # Filter out the odds for the site, that is why we grab 1 more just in case (if possible)
             return self._filter(ls, site)[: min(n, len(ls))]
         else:
             return []
 
+    # Best odds for the bet result that are not from the site, None if there are none
+    def get_best_excluding_site(self, site, bet, result):
+        self._compact((bet, result))
+        if not (best := self._best.get((bet, result))):
+            return None
+        # If the best is from the site then the runner up is the best from any other site
+        return best[0] if best[0][1].site != site else best[1]
+
+    # Returns (odds, sites, entries) where odds and sites are numpy arrays lined up with the heap entries
+    def get_arrays_for_bet_result(self, bet, result):
+        self._compact((bet, result))
+        if not (bet in self._heaps and result in self._heaps[bet]):
+            return None
+        if (bet, result) not in self._arrays:
+            entries = self._heaps[bet][result]
+            self._arrays[(bet, result)] = (
+                np.fromiter((entry[0] for entry in entries), float, len(entries)),
+                np.array([entry[1].site for entry in entries]),
+                list(entries),
+            )
+        return self._arrays[(bet, result)]
+
     def _filter(self, ls, site):
         return [bet for bet in ls if bet[1].site != site]
 
     def add_match(self, match: Match):
+        # A site only has one set of odds per match so adding it again replaces the old odds
+        if (old := self._live.get(match.site)) is match:
+            return
+        if old is not None:
+            self._invalidate(old)
+        self._live[match.site] = match
         values: dict
         for bet, values in match.odds.items():
-            if not bet in self.heaps:
-                self.heaps[bet] = {}
+            if not bet in self._heaps:
+                self._heaps[bet] = {}
             for result, ip in values.items():
-                if not result in self.heaps[bet]:
-                    self.heaps[bet][result] = []
-                heappush(self.heaps[bet][result], (ip, match))
+                key = (bet, result)
+                # Drop the stale entries first so the heap only ever holds one entry per site
+                self._compact(key)
+                if not result in self._heaps[bet]:
+                    self._heaps[bet][result] = []
+                heappush(self._heaps[bet][result], (ip, match))
+                self._arrays.pop(key, None)
+                self._update_best(key, (ip, match))
+
+    def update_match(self, match: Match):
+        self.add_match(match)
+
+    def remove_match(self, match: Match):
+        if self._live.get(match.site) is not match:
+            logging.error(f"Match {match} is not the current match for {match.site}")
+            return
+        del self._live[match.site]
+        self._invalidate(match)
+
+    def __len__(self):
+        return len(self._live)
+
+    # Marks the match's entries as stale, they are only dropped when the heap is next read
+    def _invalidate(self, match: Match):
+        for bet, values in match.odds.items():
+            for result in values:
+                self._dirty.add((bet, result))
+                self._arrays.pop((bet, result), None)
+
+    # Rebuilds the heap and best odds for the key without the stale entries
+    def _compact(self, key):
+        if key not in self._dirty:
+            return
+        self._dirty.discard(key)
+        bet, result = key
+        self._best.pop(key, None)
+        if not (bet in self._heaps and result in self._heaps[bet]):
+            return
+        heap = [
+            entry
+            for entry in self._heaps[bet][result]
+            if self._live.get(entry[1].site) is entry[1]
+        ]
+        heapify(heap)
+        self._heaps[bet][result] = heap
+        for entry in heap:
+            self._update_best(key, entry)
+
+    def _update_best(self, key, entry):
+        if not (best := self._best.get(key)):
+            self._best[key] = [entry, None]
+        elif entry[0] < best[0][0]:
+            # The old best is only the runner up if it is from another site, otherwise the runner up stays the same
+            if entry[1].site != best[0][1].site:
+                best[1] = best[0]
+            best[0] = entry
+        elif entry[1].site != best[0][1].site and (
+            not best[1] or entry[0] < best[1][0]
+        ):
+            best[1] = entry
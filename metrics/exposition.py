@@ -0,0 +1,145 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+from metrics.registry import LATENCY_BUCKETS, MetricsRegistry, metrics
+
+"""
+Serves the metrics registry in the Prometheus text format for long running sweeps
+
+server = MetricsServer(port=9108).start()
+curl http://127.0.0.1:9108/metrics
+
+The server reads a snapshot of the in-process counters from its own thread, the hot path only waits on it while the snapshot is copied
+"""
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()) -> str:
+    labels = tuple(labels) + tuple(extra)
+    if not labels:
+        return ""
+    return (
+        "{" + ",".join(f'{label}="{_escape(value)}"' for label, value in labels) + "}"
+    )
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Counters become [prefix]_[name]_total and latency histograms [prefix]_[name]_seconds
+def format_prometheus(registry: MetricsRegistry = metrics, prefix="bet_scanner") -> str:
+    snapshot = registry.snapshot()
+    lines = []
+
+    families = {}
+    for (name, labels), value in snapshot["counters"].items():
+        families.setdefault(name, []).append((labels, value))
+    for name, samples in sorted(families.items()):
+        metric = f"{prefix}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in sorted(samples):
+            lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+    families = {}
+    for (name, labels), state in snapshot["histograms"].items():
+        families.setdefault(name, []).append((labels, state))
+    for name, samples in sorted(families.items()):
+        metric = f"{prefix}_{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, (counts, count, total, _, _) in sorted(samples):
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = (("le", _format_value(bound)),)
+                lines.append(
+                    f"{metric}_bucket{_format_labels(labels, le)} {cumulative}"
+                )
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    # Set on the subclass made for each server
+    registry: MetricsRegistry = None
+    prefix = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = format_prometheus(self.registry, self.prefix).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Metrics request from {self.client_address[0]}: {format % args}")
+
+
+# Local HTTP endpoint for the registry, served from a daemon thread so it never keeps the process alive
+# port=0 picks a free port, see the port property
+class MetricsServer:
+    def __init__(
+        self,
+        registry: MetricsRegistry = metrics,
+        host="127.0.0.1",
+        port=9108,
+        prefix="bet_scanner",
+    ) -> None:
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._prefix = prefix
+        self._server = None
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1] if self._server else self._port
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._host}:{self.port}/metrics"
+
+    def start(self):
+        if self._server is not None:
+            return self
+        handler = type(
+            "MetricsHandler",
+            (_MetricsHandler,),
+            {"registry": self._registry, "prefix": self._prefix},
+        )
+        self._server = ThreadingHTTPServer((self._host, self._port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+        logging.info(f"Serving metrics on {self.url}")
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server, self._thread = None, None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
@@ -0,0 +1,264 @@
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+import threading
+import time
+
+"""
+Counters and latency histograms for each stage of a sweep, off by default
+
+metrics.enable()
+with metrics.time("soup_build", site="Site1"):
+    ...
+metrics.inc("parse_failures", kind="odds", site="Site1")
+print(metrics.report())
+
+Every call checks metrics.enabled first so a disabled registry costs one attribute lookup
+"""
+
+# Upper bounds of the latency buckets in seconds, 1us to 50s, anything slower goes in the last (+Inf) bucket
+# Built from strs so the bounds are exact ex. 2.5e-06 instead of 2.4999999999999998e-06
+LATENCY_BUCKETS = tuple(
+    float(f"{scale}e{exponent}") for exponent in range(-6, 2) for scale in (1, 2.5, 5)
+)
+
+# The stages of a sweep in the order they run, the report lists them first
+STAGES = [
+    "file_read",
+    "soup_build",
+    "section_extraction",
+    "odds_conversion",
+    "team_resolution",
+    "index_insert",
+    "hedge_solve",
+]
+
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS) -> None:
+        self._buckets = buckets
+        # One count per bucket + the +Inf bucket, not cumulative
+        self._counts = [0] * (len(buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._min = float("inf")
+        self._max = 0.0
+
+    @property
+    def buckets(self) -> tuple:
+        return self._buckets
+
+    @property
+    def counts(self) -> list:
+        return self._counts
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def min(self) -> float:
+        return self._min
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    def observe(self, value):
+        self._counts[bisect_left(self._buckets, value)] += 1
+        self._count += 1
+        self._sum += value
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    # Upper bound of the bucket the quantile falls in, the max if it is in the +Inf bucket
+    def quantile(self, q) -> float:
+        if not self._count:
+            return 0.0
+        rank, seen = q * self._count, 0
+        for bound, count in zip(self._buckets, self._counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self._max)
+        return self._max
+
+    # Pickleable state so histograms from worker processes can be merged
+    def state(self) -> tuple:
+        return list(self._counts), self._count, self._sum, self._min, self._max
+
+    def merge(self, state):
+        counts, count, total, low, high = state
+        self._counts = [a + b for a, b in zip(self._counts, counts)]
+        self._count += count
+        self._sum += total
+        self._min = min(self._min, low)
+        self._max = max(self._max, high)
+
+
+class _Timer:
+    __slots__ = ("_registry", "_key", "_start_time")
+
+    def __init__(self, registry, key) -> None:
+        self._registry = registry
+        self._key = key
+
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._registry._observe(self._key, time.perf_counter() - self._start_time)
+        return False
+
+
+# Metrics are keyed by (name, labels) where labels is a sorted tuple of (label, value) pairs
+# Every update and snapshot holds the lock so the metrics server never reads a histogram halfway through an update
+class MetricsRegistry:
+    def __init__(self, enabled=False) -> None:
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @property
+    def counters(self) -> dict:
+        return self._counters
+
+    @property
+    def histograms(self) -> dict:
+        return self._histograms
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels) -> tuple:
+        return name, tuple(sorted(labels.items())) if labels else ()
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = MetricsRegistry._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    # Records one latency in seconds
+    def observe(self, name, seconds, **labels):
+        if self.enabled:
+            self._observe(MetricsRegistry._key(name, labels), seconds)
+
+    def _observe(self, key, seconds):
+        with self._lock:
+            if (histogram := self._histograms.get(key)) is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    # with metrics.time("stage"): ... records how long the block took
+    def time(self, name, **labels):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, MetricsRegistry._key(name, labels))
+
+    # Decorator version of time, the labels are fixed when the function is decorated
+    def timed(self, name, **labels):
+        key = MetricsRegistry._key(name, labels)
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start_time = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._observe(key, time.perf_counter() - start_time)
+
+            return wrapper
+
+        return decorator
+
+    # Everything recorded so far in a pickleable form, see merge
+    # Copied under the lock so it can be called from another thread while metrics are being recorded
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": self._counters.copy(),
+                "histograms": {
+                    key: histogram.state()
+                    for key, histogram in self._histograms.items()
+                },
+            }
+
+    # Adds a snapshot from another registry, ex. one taken in a worker process
+    def merge(self, snapshot: dict):
+        with self._lock:
+            for key, value in snapshot["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, state in snapshot["histograms"].items():
+                if (histogram := self._histograms.get(key)) is None:
+                    histogram = self._histograms[key] = Histogram()
+                histogram.merge(state)
+
+    # Per run summary of every stage and counter, the known stages come first
+    def report(self) -> str:
+        order = {stage: idx for idx, stage in enumerate(STAGES)}
+        histograms = sorted(
+            self._histograms.items(),
+            key=lambda item: (order.get(item[0][0], len(order)), item[0]),
+        )
+        counters = sorted(self._counters.items())
+        width = max(
+            [len("labels")]
+            + [
+                len(MetricsRegistry._format_labels(labels))
+                for (_, labels), _ in histograms + counters
+            ]
+        )
+        lines = [
+            f"{'stage':<20} {'labels':<{width}} {'count':>8} {'total s':>10} {'mean ms':>10} "
+            f"{'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}"
+        ]
+        for (name, labels), histogram in histograms:
+            lines.append(
+                f"{name:<20} {MetricsRegistry._format_labels(labels):<{width}} "
+                f"{histogram.count:>8} {histogram.sum:>10.4f} "
+                f"{histogram.mean * 1000:>10.3f} {histogram.quantile(0.5) * 1000:>10.3f} "
+                f"{histogram.quantile(0.95) * 1000:>10.3f} {histogram.max * 1000:>10.3f}"
+            )
+        if counters:
+            lines.append("")
+            lines.append(f"{'counter':<20} {'labels':<{width}} {'value':>8}")
+            for (name, labels), value in counters:
+                lines.append(
+                    f"{name:<20} {MetricsRegistry._format_labels(labels):<{width}} {value:>8}"
+                )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_labels(labels) -> str:
+        return ",".join(f"{label}={value}" for label, value in labels)
+
+
+# The registry every module records into
+metrics = MetricsRegistry()
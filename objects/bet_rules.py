@@ -1,5 +1,6 @@
-from sympy import solve, Symbol, Eq
 from enum import Enum
+from functools import lru_cache
+import numpy as np
 from parsers.site_parser import SiteParser
 from abc import ABC, abstractmethod
 
@@ -54,6 +55,12 @@ class BonusRules(BetRules):
     def get_bonus_payout(self, bet, odds):
         return self.get_bonus_amount(bet, odds) * self.bonus
 
+    # get_bonus_payout for an array of odds
+    def get_bonus_payout_batch(self, bet, odds: np.ndarray) -> np.ndarray:
+        return np.where(self.qualifies(odds), np.minimum(self.max_bet, bet), 0) * (
+            self.bonus
+        )
+
 
 class ProfitBoostRules(BetRules):
     def __init__(self, max_bet, bonus=0, min_odds="1.0", max_winnings=float("inf")):
@@ -76,30 +83,66 @@ class ProfitBoostRules(BetRules):
         boosted_odds = self.get_boosted_odds(odds) if not boosted else odds
         if self.qualifies(odds):
             if boosted_odds < self.max_odds:
-                max_bet_for_odds = self.get_max_bet(boosted_odds)
-                return min(self.max_bet, bet, max_bet_for_odds)
+                return min(
+                    bet,
+                    ProfitBoostRules.calc_capped_bet(
+                        self.max_winnings, self.max_bet, boosted_odds
+                    ),
+                )
             return min(self.max_bet, bet)
         return 0
 
+    # get_bonus_amount for an array of odds, boosted_odds are the boosted odds for each of them
+    def get_bonus_amount_batch(
+        self, odds: np.ndarray, boosted_odds: np.ndarray, bet=float("inf")
+    ) -> np.ndarray:
+        amount = np.minimum(self.max_bet, bet)
+        # Same closed form as calc_capped_bet
+        max_bet_for_odds = np.where(
+            boosted_odds == 0,
+            np.inf,
+            self.max_winnings / (1 / boosted_odds - 1),
+        )
+        amount = np.where(
+            boosted_odds < float(self.max_odds),
+            np.minimum(amount, max_bet_for_odds),
+            amount,
+        )
+        return np.where(self.qualifies(odds), amount, 0)
+
     def get_max_odds(self, bet=None):
         if self.max_winnings == float("inf"):
             return 0
         bet = min(self.max_bet, bet) if bet else self.max_bet
-        max_boosted_odds = Symbol("max_boosted_odds")
-        # Calculates the odds that would return the max winnings for the max bet
-        eq = Eq(bet / max_boosted_odds - bet, self._max_winnings)
-        return solve(eq, max_boosted_odds)[0]
+        return ProfitBoostRules.calc_max_odds(self.max_winnings, bet)
 
     def get_max_bet(self, odds):
         if odds == 0:
             return float("inf")
-        max_bet = Symbol("max_bet")
-        # Calculates the odds that would return the max winnings for the max bet
-        eq = Eq(max_bet / odds - max_bet, self._max_winnings)
-        return solve(eq, max_bet)[0]
+        return ProfitBoostRules.calc_max_bet(self.max_winnings, odds)
 
     # Payout doesnt need to be calculated here, it is calculated in the bet class since it depends on the other variables
 
+    # Calculates the odds that would return the max winnings for the bet
+    # bet / max_odds - bet = max_winnings
+    @staticmethod
+    def calc_max_odds(max_winnings, bet):
+        return bet / (max_winnings + bet)
+
+    # Calculates the bet that would return the max winnings at the odds
+    # max_bet / odds - max_bet = max_winnings
+    @staticmethod
+    def calc_max_bet(max_winnings, odds):
+        return max_winnings * odds / (1 - odds)
+
+    # Profit boost sweeps check the same prices over and over so this is cached
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def calc_capped_bet(max_winnings, max_bet, odds):
+        if odds == 0:
+            return max_bet
+        return min(max_bet, ProfitBoostRules.calc_max_bet(max_winnings, odds))
+
     @staticmethod
     def calc_odds_boost(odds, boost):
         x = ((1 / odds) - 1) * (1 + boost) + 1
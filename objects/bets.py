@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 import logging
-from sympy import solve, Symbol, Eq
+import numpy as np
+from sympy import solve, Symbol, Eq, lambdify
 from objects.bet_rules import BonusRules, ProfitBoostRules, BetType
 
 
@@ -84,12 +85,28 @@ def verify_calc_matching_bets(func):
 
 
 class Bet(ABC):
-    LEFT, RIGHT = True, False
     BET, ODDS = Symbol("bet"), Symbol("odds")
 
+    # Left side of the payout equation, subclasses add their promo terms to it
+    EQ = BET / ODDS
+
+    # Variables that show up as 1/x in the equation, every other variable shows up linearly
+    ODDS_VARIABLES = {ODDS}
+
+    # Solves matching bets with sympy instead of the closed form, its a lot slower so only use it to double check
+    symbolic = False
+
+    # The equation is built and compiled once per class, instances only bind the values
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._eq = Eq(cls.EQ, 0)
+        cls._eq_args = sorted(cls.EQ.free_symbols, key=str)
+        cls._eq_func = staticmethod(lambdify(cls._eq_args, cls.EQ, "math"))
+        # Same equation for arrays, used to evaluate the bet at every odds of a slate at once
+        cls._eq_func_batch = staticmethod(lambdify(cls._eq_args, cls.EQ, "numpy"))
+
     @abstractmethod
     def __init__(self, bet=None, odds=None, bonus=BonusRules()) -> None:
-        self._eq = Eq(Bet.BET / Bet.ODDS, 0)
         self._bonus, self._odds, self._bet = bonus, odds, bet
 
     @property
@@ -137,26 +154,6 @@ class Bet(ABC):
             result.append(Bet.ODDS)
         return result
 
-    def add_to_ls(self, value):
-        self._eq = Bet.add_to_eq(self.eq, value, Bet.LEFT)
-
-    def add_to_rs(self, value):
-        self._eq = Bet.add_to_eq(self.eq, value, Bet.RIGHT)
-
-    @staticmethod
-    def add_to_eq(eq, value, side):
-        n = Symbol("n")
-        # temp: n = value
-        if side == Bet.LEFT:
-            temp = Eq(n, value)
-        else:
-            temp = Eq(value, n)
-        # eq:
-        # self.ls is flipped since we put self.ls on the rs so it is: 0 = |self.ls|
-        # flipped self.ls + temp -> n + 0 = value + |self.ls|
-        eq = Eq(temp, eq)
-        return Eq(solve(eq, n)[0], 0)
-
     @staticmethod
     def _sum_ls_rs(ls_bets: list, rs_bets: list, invert=False):
         total_payout, total_spent = 0, 0
@@ -170,10 +167,55 @@ class Bet(ABC):
         return total_payout * (-1 if invert else 1), total_spent
 
     def solve_matching_bets(self, payout, known_variables, unknown_variable):
-        eq = self.eq.subs(known_variables)
-        bet_eq = Bet.add_to_eq(eq, payout, Bet.RIGHT)
+        if Bet.symbolic:
+            return Bet._solve_matching_bets_symbolic(
+                self.eq, payout, known_variables, unknown_variable
+            )
+
+        # Every equation is linear in the unknown (or in 1/unknown for odds) so
+        # eq = slope * x + intercept, evaluating it at two points gives both
+        def eval_eq(value):
+            variables = {
+                key: value if known is unknown_variable else known
+                for key, known in known_variables.items()
+            }
+            variables[unknown_variable] = value
+            return self._eval_eq(variables)
+
+        if unknown_variable in self.ODDS_VARIABLES:
+            # x = 1/odds, plugging in odds = inf zeroes out every x term
+            intercept = eval_eq(float("inf"))
+            slope = eval_eq(1.0) - intercept
+            return slope / (payout - intercept)
+        intercept = eval_eq(0.0)
+        slope = eval_eq(1.0) - intercept
+        return (payout - intercept) / slope
+
+    @staticmethod
+    def _solve_matching_bets_symbolic(eq, payout, known_variables, unknown_variable):
+        bet_eq = Eq(eq.lhs.subs(known_variables), payout)
         solution = solve(bet_eq, unknown_variable)[0]
-        return solution
+        return float(solution)
+
+    # Numeric version of the left side of self.eq
+    def _eval_eq(self, variables):
+        return self._eq_func(*[variables[arg] for arg in self._eq_args])
+
+    # calc_bet_ev for the bet placed at each of the odds, returns (payout, spent) arrays
+    # The payout is the class's EQ plus the bonus so it stays in sync with the solver
+    def calc_bet_ev_batch(self, odds: np.ndarray) -> tuple:
+        bet = self.bet
+        variables, bonus_bet, spent = self._get_batch_variables(bet, odds)
+        variables[Bet.BET], variables[Bet.ODDS] = bet, odds
+        payout = self._eq_func_batch(
+            *[variables[arg] for arg in self._eq_args]
+        ) + self.bonus.get_bonus_payout_batch(bonus_bet, odds)
+        return payout, np.full(len(odds), spent, dtype=float)
+
+    # The values of the promo variables in EQ when the bet is placed at each of the odds
+    # Returns ({symbol: value or array}, amount the bonus applies to, amount spent)
+    def _get_batch_variables(self, bet, odds):
+        return {}, bet, bet
 
     @abstractmethod
     def _calc_bonus_payout(self, *args, **kwargs):
@@ -228,6 +270,7 @@ class NormalBet(Bet):
 
 class FreeBet(Bet):
     BET = Symbol("free_bet")
+    EQ = Bet.EQ - BET
     bet_type = BetType.FREE
 
     def __init__(
@@ -235,7 +278,6 @@ class FreeBet(Bet):
     ) -> None:
         super().__init__(bet, odds, bonus)
         self._splitable = splitable
-        self.add_to_ls(Eq(-FreeBet.BET, 0))
         self._amount_free = amount_free
 
     @property
@@ -253,6 +295,14 @@ class FreeBet(Bet):
     def _calc_bonus_payout(self, bet, odds, amount_free):
         return self.bonus.get_bonus_payout(bet - amount_free, odds)
 
+    def _get_batch_variables(self, bet, odds):
+        free_bet_amount = self.get_free_bet_wager(bet)
+        return (
+            {FreeBet.BET: free_bet_amount},
+            bet - free_bet_amount,
+            bet - free_bet_amount,
+        )
+
     # Todo: This is not correct, maybe it is, but I am not sure, I never need to do this though. I am always converting free bets never are they unknown
     @verify_calc_matching_bets
     def calc_matching_bets(self, payout, spent, known_variables, unknown_variable):
@@ -301,18 +351,13 @@ class FreeBet(Bet):
 class ProfitBoostBet(Bet):
     bet_type = BetType.PROFIT_BOOST
     BET, ODDS = Symbol("boosted_bet"), Symbol("boosted_odds")
+    EQ = Bet.EQ - BET / Bet.ODDS + BET / ODDS
+    ODDS_VARIABLES = {Bet.ODDS, ODDS}
 
     def __init__(
         self, bet=None, odds=None, bonus=BonusRules(), profit_boost=ProfitBoostRules(0)
     ) -> None:
         super().__init__(bet, odds, bonus)
-        self.add_to_ls(
-            Eq(
-                -ProfitBoostBet.BET / Bet.ODDS
-                + ProfitBoostBet.BET / ProfitBoostBet.ODDS,
-                0,
-            )
-        )
         self._profit_boost = profit_boost
 
     @property
@@ -322,6 +367,20 @@ class ProfitBoostBet(Bet):
     def _calc_bonus_payout(self, bet, odds):
         return self.bonus.get_bonus_payout(bet, odds)
 
+    def _get_batch_variables(self, bet, odds):
+        boosted_odds = self.profit_boost.get_boosted_odds(odds)
+        profit_boost_amount = self.profit_boost.get_bonus_amount_batch(
+            odds, boosted_odds, bet=bet
+        )
+        return (
+            {
+                ProfitBoostBet.BET: profit_boost_amount,
+                ProfitBoostBet.ODDS: boosted_odds,
+            },
+            bet,
+            bet,
+        )
+
     @verify_calc_bet_ev
     def calc_bet_ev(self, known_variables):
         # Determine variables
@@ -374,6 +433,7 @@ class ProfitBoostBet(Bet):
 
 class InsuredBet(Bet):
     BET = Symbol("insured_bet")
+    EQ = Bet.EQ - BET * 0.7
     bet_type = BetType.INSURED
 
     def __init__(
@@ -381,7 +441,6 @@ class InsuredBet(Bet):
     ) -> None:
         super().__init__(bet, odds, bonus)
         self._splitable = splitable
-        self.add_to_ls(Eq(-InsuredBet.BET * 0.7, 0))
         self._amount_insured = amount_insured
 
     @property
@@ -403,6 +462,10 @@ class InsuredBet(Bet):
     def _calc_bonus_payout(self, bet, odds):
         return self.bonus.get_bonus_payout(bet, odds)
 
+    def _get_batch_variables(self, bet, odds):
+        insured_bet_amount = self.get_amount_insured(bet)
+        return {InsuredBet.BET: insured_bet_amount}, bet, bet - insured_bet_amount * 0.7
+
     # Todo: This is not correct, maybe it is, but I am not sure
     @verify_calc_matching_bets
     def calc_matching_bets(self, payout, spent, known_variables, unknown_variable):
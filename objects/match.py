@@ -46,4 +46,8 @@ class Match:
         return self.id == other.id
 
     def __hash__(self):
-        return hash(self.id)
\ No newline at end of file
+        return hash(self.id)
+
+    # Only used to break ties between equal odds in the comparer heaps
+    def __lt__(self, other):
+        return (self.id, self.site) < (other.id, other.site)
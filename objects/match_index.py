@@ -0,0 +1,51 @@
+import datetime as dt
+from objects.match import Match
+
+
+# Match ids need the exact same kickoff time, but sites round times differently (or put a late game on the next day)
+# so this groups matches by category and teams and then treats kickoffs within the tolerance as the same game
+class MatchIndex:
+    def __init__(self, tolerance=dt.timedelta(hours=2)) -> None:
+        self._tolerance = tolerance
+        self._buckets = {}
+        # buckets {
+        #   (category, teams): [canonical matches]
+        #   }
+        #
+
+    @property
+    def tolerance(self) -> dt.timedelta:
+        return self._tolerance
+
+    @staticmethod
+    def _bucket_key(match: Match):
+        return (match.category, frozenset(match.teams))
+
+    # Returns the first match seen for the same game, None if the game has not been seen
+    def find(self, match: Match) -> Match:
+        closest, closest_delta = None, None
+        for canonical in self._buckets.get(MatchIndex._bucket_key(match), []):
+            delta = abs(canonical.date - match.date)
+            if delta <= self.tolerance and (
+                closest_delta is None or delta < closest_delta
+            ):
+                closest, closest_delta = canonical, delta
+        return closest
+
+    # Same as find but a new game is added with the match as its canonical match
+    def canonical(self, match: Match) -> Match:
+        if (closest := self.find(match)) is None:
+            self._buckets.setdefault(MatchIndex._bucket_key(match), []).append(match)
+            return match
+        return closest
+
+    # Joins the matches from every site in one pass, returns {canonical match: [matches for that game]}
+    def join(self, *match_lists) -> dict:
+        games = {}
+        for match_list in match_lists:
+            for match in match_list:
+                games.setdefault(self.canonical(match), []).append(match)
+        return games
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._buckets.values())
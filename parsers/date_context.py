@@ -0,0 +1,60 @@
+import datetime as dt
+from datetime import datetime
+import re
+
+
+# Everything the date normalization needs from the current day, built once per parse run instead of for every match row
+class DateContext:
+    DATE_FORMAT = "%a %b %d"
+    DATE_SUFFIXES = ["rd", "st", "nd", "th"]
+    DATE_SUFFIX_RE = re.compile(rf"(\d+)(?:{'|'.join(DATE_SUFFIXES)})")
+
+    def __init__(self, today: datetime = None) -> None:
+        self._today = today or datetime.today()
+        self._today_str = self._today.strftime(DateContext.DATE_FORMAT)
+        self._tomorrow_str = (self._today + dt.timedelta(days=1)).strftime(
+            DateContext.DATE_FORMAT
+        )
+        self._year_str = self._today.strftime(" %Y")
+        # {abbreviated day name: date of the next day with that name}, today counts as the next one
+        self._weekdays = {}
+        for delta in range(7):
+            day = self._today + dt.timedelta(days=delta)
+            self._weekdays[day.strftime("%a").lower()] = day.strftime(
+                DateContext.DATE_FORMAT
+            )
+        # {raw date str: datetime}
+        self._memo = {}
+
+    @property
+    def today(self) -> datetime:
+        return self._today
+
+    def replace_td_tmr(self, date):
+        date = date.replace("today", self._today_str)
+        date = date.replace("tomorrow", self._tomorrow_str)
+        return date
+
+    # Each number keeps its own digits, ex. "Oct 3rd - Oct 23rd" -> "Oct 3 - Oct 23"
+    # SiteParser used to replace every number with the same suffix by the first one ("Oct 3 - Oct 3")
+    # Dates with one number per suffix, which is every date the parsers read, come out the same
+    def remove_date_suffixes(self, date):
+        return DateContext.DATE_SUFFIX_RE.sub(r"\1", date)
+
+    def append_year(self, date):
+        return date + self._year_str
+
+    def get_date_from_day(self, date):
+        split_input = date.split(" ", 1)
+        try:
+            return self._weekdays[split_input[0].lower()] + " " + split_input[1]
+        except KeyError:
+            raise ValueError(f"'{split_input[0]}' is not a day of the week")
+
+    # Returns func(*args) for the key, it is only called the first time the key is seen in this run
+    def memo(self, key, func, *args):
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = func(*args)
+            return value
@@ -0,0 +1,137 @@
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+import threading
+import time
+from parsers.parse_cache import ParseCache
+from parsers.site_parser import SiteParser
+from metrics.registry import metrics
+
+
+# The context for worker pools, shared with BetComparer._get_best_given_promotions
+# The platform's default start method is kept unless it is fork (macOS defaults to spawn, forking is unsafe with its system frameworks)
+# Fork is only used while this is the only thread, a fork next to another thread (ex. the metrics server) copies any lock it holds
+def get_pool_context():
+    start_method = multiprocessing.get_start_method()
+    if start_method != "fork" or threading.active_count() == 1:
+        return multiprocessing.get_context(start_method)
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _parse_site(parser, cache=None):
+    start_time = time.perf_counter()
+    try:
+        matches = cache.parse(parser) if cache else parser.parse_data()
+    except Exception as err:
+        metrics.inc("parse_failures", kind="site", site=parser.site)
+        logging.error(f"Error parsing {parser.site} from {parser.file}: {err}")
+        matches = []
+    return matches, time.perf_counter() - start_time
+
+
+# Runs in the worker process, its metrics are sent back with the matches so the parent can merge them
+def _parse_site_in_worker(parser, cache=None, collect_metrics=False):
+    metrics.reset()
+    metrics.enable(collect_metrics)
+    matches, seconds = _parse_site(parser, cache)
+    return matches, seconds, metrics.snapshot()
+
+
+# Parses every site in its own worker process so the wall clock time is the slowest site instead of the sum
+# Returns ({parser: matches}, {parser: seconds}), processes=1 parses them one after another
+# With a ParseCache sites whose html has not changed are loaded instead of parsed
+def parse_sites(parsers: list, processes=None, cache: ParseCache = None):
+    if processes == 1:
+        results = [_parse_site(parser, cache) for parser in parsers]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processes or len(parsers), mp_context=get_pool_context()
+        ) as pool:
+            results = []
+            for matches, seconds, snapshot in pool.map(
+                _parse_site_in_worker,
+                parsers,
+                [cache] * len(parsers),
+                [metrics.enabled] * len(parsers),
+            ):
+                metrics.merge(snapshot)
+                results.append((matches, seconds))
+
+    match_lists, timings = {}, {}
+    for parser, (matches, seconds) in zip(parsers, results):
+        match_lists[parser], timings[parser] = matches, seconds
+        metrics.inc("matches_parsed", len(matches), site=parser.site)
+        metrics.observe("site_parse", seconds, site=parser.site)
+        logging.info(
+            f"Parsed {len(matches)} matches from {parser.site} in {seconds:.4f}s"
+        )
+    return match_lists, timings
+
+
+# Returns ((matches, changed, removed), seconds, the site's new section state), see SiteParser.parse_changed_data
+# A site that fails to parse keeps its last matches and state
+def _parse_site_changes(parser, cache=None, state=None):
+    start_time = time.perf_counter()
+    if state is None:
+        SiteParser._sections.pop(parser.site, None)
+    else:
+        SiteParser._sections[parser.site] = state
+    try:
+        changes = parser.parse_changed_data(cache)
+    except Exception as err:
+        metrics.inc("parse_failures", kind="site", site=parser.site)
+        logging.error(f"Error parsing {parser.site} from {parser.file}: {err}")
+        changes = (state[3] if state else [], [], [])
+    state = SiteParser._sections.get(parser.site)
+    return changes, time.perf_counter() - start_time, state
+
+
+def _parse_site_changes_in_worker(
+    parser, cache=None, state=None, collect_metrics=False
+):
+    metrics.reset()
+    metrics.enable(collect_metrics)
+    changes, seconds, state = _parse_site_changes(parser, cache, state)
+    return changes, seconds, state, metrics.snapshot()
+
+
+# parse_sites for a long running sweep, only the sections whose html changed since the last call are reparsed
+# sections {site: state} is kept by the caller between calls and updated in place, the workers dont keep anything
+# Returns ({parser: matches}, {parser: (changed, removed)}, {parser: seconds}), the changes go to BetComparer.update_matches
+def parse_site_changes(
+    parsers: list, sections: dict, processes=None, cache: ParseCache = None
+):
+    states = [sections.get(parser.site) for parser in parsers]
+    if processes == 1:
+        results = [
+            _parse_site_changes(parser, cache, state)
+            for parser, state in zip(parsers, states)
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processes or len(parsers), mp_context=get_pool_context()
+        ) as pool:
+            results = []
+            for changes, seconds, state, snapshot in pool.map(
+                _parse_site_changes_in_worker,
+                parsers,
+                [cache] * len(parsers),
+                states,
+                [metrics.enabled] * len(parsers),
+            ):
+                metrics.merge(snapshot)
+                results.append((changes, seconds, state))
+
+    match_lists, changes, timings = {}, {}, {}
+    for parser, ((matches, changed, removed), seconds, state) in zip(parsers, results):
+        sections[parser.site] = state
+        match_lists[parser], timings[parser] = matches, seconds
+        changes[parser] = (changed, removed)
+        metrics.inc("matches_parsed", len(changed), site=parser.site)
+        metrics.observe("site_parse", seconds, site=parser.site)
+        logging.info(
+            f"Parsed {len(changed)} changed and {len(removed)} removed matches from {parser.site} in {seconds:.4f}s"
+        )
+    return match_lists, changes, timings
@@ -0,0 +1,59 @@
+from datetime import datetime
+import hashlib
+import logging
+import os
+import pickle
+from objects.match import Match
+
+
+# Caches each site's parsed matches keyed by the site, the parser class and version, the day and a hash of the pasted html
+# so a site only gets reparsed when its file (or its parser) changes
+# The day is part of the key since today/tomorrow/weekdays and the year are resolved against the day the page is parsed
+class ParseCache:
+    def __init__(self, directory=".parse_cache") -> None:
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def _get_path(self, parser, day, digest):
+        return os.path.join(
+            self.directory,
+            f"{parser.site}_{parser.__name__}_v{parser.version}_{day}_{digest}.pickle",
+        )
+
+    def parse(self, parser) -> list:
+        with open(parser.file, "rb") as fp:
+            digest = hashlib.sha256(fp.read()).hexdigest()
+        path = self._get_path(parser, datetime.today().strftime("%Y%m%d"), digest)
+        if (matches := self._load(path)) is not None:
+            logging.info(f"Loaded {len(matches)} cached matches for {parser.site}")
+            return matches
+        matches = parser.parse_data()
+        self._save(parser, path, matches)
+        return matches
+
+    def _load(self, path):
+        try:
+            with open(path, "rb") as fp:
+                return [Match(*row) for row in pickle.load(fp)]
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logging.warning(f"Ignoring unreadable parse cache {path}: {err}")
+            return None
+
+    def _save(self, parser, path, matches):
+        os.makedirs(self.directory, exist_ok=True)
+        # Only the latest snapshot for each site is kept
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{parser.site}_"):
+                os.remove(os.path.join(self.directory, name))
+        # Plain tuples keep the file small and dont depend on the Match internals
+        rows = [
+            (match.site, match.category, match.date, match.teams, match.odds)
+            for match in matches
+        ]
+        with open(path, "wb") as fp:
+            pickle.dump(rows, fp, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,376 @@
+import logging
+import math
+from bs4 import SoupStrainer
+from objects.match import Match
+from parsers.site_parser import SiteParser
+from metrics.registry import metrics
+
+
+# A find/find_all call with its SoupStrainer built once instead of on every call
+# then= searches inside the first element found ex. match.find(...).find_all(...)
+# fallback= is used when nothing is found ex. row.find_all(...) or row.find_all(...)
+class Selector:
+    def __init__(self, name=None, attrs={}, then=None, fallback=None, **kwargs) -> None:
+        self._strainer = SoupStrainer(name, attrs, **kwargs)
+        self._then = then
+        self._fallback = fallback
+
+    @property
+    def strainer(self) -> SoupStrainer:
+        return self._strainer
+
+    # Returns None if nothing is found
+    def find(self, tag):
+        found = tag.find(self._strainer)
+        if found is not None and self._then is not None:
+            found = self._then.find(found)
+        if found is None and self._fallback is not None:
+            return self._fallback.find(tag)
+        return found
+
+    # Returns an empty list if nothing is found
+    def find_all(self, tag):
+        if self._then is None:
+            found = tag.find_all(self._strainer)
+        elif (outer := tag.find(self._strainer)) is not None:
+            found = self._then.find_all(outer)
+        else:
+            found = []
+        if not found and self._fallback is not None:
+            return self._fallback.find_all(tag)
+        return found
+
+
+# Selects the element it is given, for odds that are the text of the column itself
+class SelfSelector:
+    def find(self, tag):
+        return tag
+
+    def find_all(self, tag):
+        return [tag]
+
+
+SELF = SelfSelector()
+
+
+# Declarative description of a site's page, every site follows category -> bets -> matches -> date/teams/odds
+# sections: the category views the page is split into, also used as the SoupStrainer for the page
+# category: read by the parser's standardize_category, many_categories passes every element found
+# tables / live_tables: the section's odds table is the first table that is not live
+# groups / group_date: tables split into days, the day's date is read by standardize_date and prefixed to each row's time
+# bets: the bet columns of the table, parsed with parse_bets_batch
+# matches: the match elements, header_rows are skipped and rows_per_match rows make up one match (one team each)
+# skip_matches / require_matches: matches are skipped if any skip selector or a missing require selector is found
+# date: passed to standardize_datetime, for grouped tables it is the row's time
+# teams: both team names of a match, or the team name of a row when rows_per_match is 2
+# cols: one column per bet, skip_cols and empty cols (if skip_empty_cols) are not parsed
+# skipped_cols_take_bet: False if a skipped column does not line up with a bet
+# cells: one cell per team in each column, otherwise the column has a list of odds and a list of bet_headers
+# odds / moneyline_odds / bet_headers: the odds and headers inside a cell or column, SELF for the element itself
+class SiteSchema:
+    def __init__(
+        self,
+        sections: Selector,
+        category: Selector,
+        bets: Selector,
+        matches: Selector,
+        date: Selector,
+        teams: Selector,
+        cols: Selector,
+        odds: Selector,
+        bet_headers: Selector,
+        many_categories=False,
+        tables: Selector = None,
+        live_tables: Selector = None,
+        groups: Selector = None,
+        group_date: Selector = None,
+        header_rows=0,
+        rows_per_match=1,
+        skip_matches=(),
+        require_matches=(),
+        skip_cols=(),
+        skip_empty_cols=False,
+        skipped_cols_take_bet=True,
+        cells: Selector = None,
+        skip_cells=(),
+        moneyline_odds: Selector = None,
+    ) -> None:
+        self.sections = sections
+        self.category = category
+        self.bets = bets
+        self.matches = matches
+        self.date = date
+        self.teams = teams
+        self.cols = cols
+        self.odds = odds
+        self.bet_headers = bet_headers
+        self.many_categories = many_categories
+        self.tables = tables
+        self.live_tables = live_tables
+        self.groups = groups
+        self.group_date = group_date
+        self.header_rows = header_rows
+        self.rows_per_match = rows_per_match
+        self.skip_matches = tuple(skip_matches)
+        self.require_matches = tuple(require_matches)
+        self.skip_cols = tuple(skip_cols)
+        self.skip_empty_cols = skip_empty_cols
+        self.skipped_cols_take_bet = skipped_cols_take_bet
+        self.cells = cells
+        self.skip_cells = tuple(skip_cells)
+        self.moneyline_odds = moneyline_odds or odds
+
+
+# A schema compiled for one parser, the layout specific steps are picked once here instead of checked for every row
+class SchemaPlan:
+    def __init__(self, parser) -> None:
+        self._parser = parser
+        self._site = parser.site
+        schema: SiteSchema = parser.schema
+        self._schema = schema
+        self._find_category = (
+            schema.category.find_all if schema.many_categories else schema.category.find
+        )
+        self._parse_matches = (
+            self._parse_paired_rows
+            if schema.rows_per_match > 1
+            else self._parse_match_rows
+        )
+        self._add_col = (
+            self._add_col_cells if schema.cells is not None else self._add_col_lists
+        )
+        self._skip_cols = schema.skip_cols
+        self._skip_matches = schema.skip_matches
+        self._require_matches = schema.require_matches
+        self._skip_cells = schema.skip_cells
+
+    @property
+    def schema(self) -> SiteSchema:
+        return self._schema
+
+    def parse_section(self, section) -> list:
+        schema, parser = self._schema, self._parser
+        category = parser.standardize_category(self._find_category(section))
+        # It has to break for invalid categories or it will throw a bunch of flakes
+        if not category:
+            return []
+
+        if schema.tables is not None:
+            live_tables = {id(table) for table in schema.live_tables.find_all(section)}
+            tables = [
+                table
+                for table in schema.tables.find_all(section)
+                if id(table) not in live_tables
+            ][:1]
+        else:
+            tables = [section]
+        if schema.groups is not None:
+            tables = [
+                group for table in tables for group in schema.groups.find_all(table)
+            ]
+
+        match_list = []
+        for table in tables:
+            # Standardize the bets ex. moneyline, ml, money line -> moneyline
+            # Empty and unparsable bets are dropped like the decorated parse_bets did
+            bets = SchemaPlan._parsed(
+                SiteParser.parse_bets_batch(
+                    self._site,
+                    category,
+                    SiteParser.clean_soup(schema.bets.find_all(table)),
+                )
+            )
+            rows = schema.matches.find_all(table)[schema.header_rows :]
+            if not (bets and rows):
+                logging.error("No data found for " + self._site)
+                continue
+            match_list.extend(self._parse_matches(category, table, bets, rows))
+        return match_list
+
+    def _is_skipped(self, row) -> bool:
+        return any(selector.find(row) for selector in self._skip_matches) or not all(
+            selector.find(row) for selector in self._require_matches
+        )
+
+    # One match per row with both teams
+    def _parse_match_rows(self, category, table, bets, rows):
+        schema, parser = self._schema, self._parser
+        for row in rows:
+            if self._is_skipped(row):
+                continue
+
+            # Standardizes the date format
+            date_time = parser.standardize_datetime(schema.date.find(row))
+
+            # Standardizes the team names
+            team_names = SchemaPlan._parsed(
+                SiteParser.parse_team_names_batch(
+                    self._site,
+                    category,
+                    SiteParser.clean_soup(schema.teams.find_all(row)),
+                )
+            )
+
+            # Get the odds for the bets
+            odds = {}
+            cols = schema.cols.find_all(row)
+            if len(cols) != len(bets):
+                logging.warning(
+                    "Number of odds does not match number of bets " + self._site
+                )
+            if date_time and team_names and len(team_names) == 2 and cols:
+                self._add_cols(category, odds, cols, team_names, bets)
+
+            if odds:
+                yield Match(self._site, category, date_time, team_names, odds)
+
+    # Matches are groups of rows_per_match rows with one team each, the date is the table's date + the first row's time
+    def _parse_paired_rows(self, category, table, bets, rows):
+        schema, parser = self._schema, self._parser
+        date = parser.standardize_date(schema.group_date.find(table))
+        if not date:
+            logging.error("No data found for " + self._site)
+            return
+        step = schema.rows_per_match
+        for start in range(0, len(rows), step):
+            date_time, team_names, odds = None, [], {}
+            for row in rows[start : start + step]:
+                # Checks everything is good before adding another row, otherwise theres no point!
+                if (team_names and not date_time) or self._is_skipped(row):
+                    break
+
+                # Standardizes the date format, usually only the first row has the time
+                if (time_soup := schema.date.find(row)) is not None and (
+                    time := SiteParser.parse_date_time(self._site, date_soup_=time_soup)
+                ):
+                    date_time = parser.standardize_datetime(date + " " + time)
+
+                team_name = SchemaPlan._parsed(
+                    SiteParser.parse_team_names_batch(
+                        self._site,
+                        category,
+                        SiteParser.clean_soup(schema.teams.find(row)),
+                    )
+                )
+                if not team_name:
+                    break
+                team_names.append(team_name[0])
+                if date_time:
+                    self._add_cols(
+                        category, odds, schema.cols.find_all(row), team_name, bets
+                    )
+
+            # Checks everything is good before adding the match
+            if len(team_names) == step and odds and date_time:
+                yield Match(self._site, category, date_time, team_names, odds)
+
+    def _add_cols(self, category, odds, cols, team_names, bets):
+        idx = 0
+        for col in cols:
+            if any(selector.find(col) for selector in self._skip_cols) or (
+                self._schema.skip_empty_cols and not col.find()
+            ):
+                idx += self._schema.skipped_cols_take_bet
+                continue
+            if idx >= len(bets):
+                break
+            try:
+                self._add_col(category, odds, col, team_names, bets[idx])
+            except Exception as err:
+                logging.error(f"Error parsing odds for {self._site} {err}")
+            idx += 1
+
+    # Each column has a cell for each team with its odds and bet header
+    def _add_col_cells(self, category, odds, col, team_names, bet):
+        schema = self._schema
+        odds_selector = schema.moneyline_odds if bet == "moneyline" else schema.odds
+        for team_name, cell in zip(team_names, schema.cells.find_all(col)):
+            if any(selector.find(cell) for selector in self._skip_cells):
+                # This would be handled by odds_conversion but the flakes are ugly
+                continue
+            if not (odd := self._convert_odds(odds_selector.find(cell))):
+                continue
+            bet_header = None
+            if bet != "moneyline" and (header := schema.bet_headers.find(cell)):
+                bet_header = SiteParser.parse_bet_headers_batch(
+                    self._site, category, SiteParser.clean_soup(header)
+                )
+                bet_header = bet_header[0] if bet_header else None
+            SchemaPlan._add_odd(odds, bet, team_name, bet_header, odd)
+
+    # Each column has a list of odds and a list of bet headers, one for each team
+    def _add_col_lists(self, category, odds, col, team_names, bet):
+        schema = self._schema
+        odds_selector = schema.moneyline_odds if bet == "moneyline" else schema.odds
+        # Invalid odds are nan so every odd keeps its position
+        odds_list = SiteParser.odds_conversion_batch(
+            odds_selector.find_all(col), self._site
+        ).tolist()
+        if bet == "moneyline":
+            bet_headers = [None] * len(odds_list)
+        else:
+            bet_headers = SiteParser.parse_bet_headers_batch(
+                self._site,
+                category,
+                SiteParser.clean_soup(schema.bet_headers.find_all(col)),
+            )
+        for team_name, bet_header, odd in zip(team_names, bet_headers, odds_list):
+            if not math.isnan(odd):
+                SchemaPlan._add_odd(odds, bet, team_name, bet_header, odd)
+
+    def _convert_odds(self, soup):
+        if soup is None:
+            return None
+        return SiteParser.convert_site_odds(self._site, SiteParser.clean_str(soup.text))
+
+    # Drops the None results of a parse_*_batch helper
+    @staticmethod
+    def _parsed(results) -> list:
+        return [result for result in results if result is not None]
+
+    # Moneylines are keyed by team, spreads by team + header ex. "+1.5", totals by header ex. "o 8.5"
+    # Odds whose header could not be parsed (None) are skipped
+    @staticmethod
+    def _add_odd(odds, bet, team_name, bet_header, odd):
+        if bet == "moneyline":
+            key = team_name
+        elif bet_header is None:
+            return
+        elif bet == "spread":
+            key = team_name + bet_header
+        else:
+            key = bet_header
+        odds.setdefault(bet, {})[key] = odd
+
+
+# A site parser driven by its schema, only the standardize_* methods for the site's formats are left to write
+class SchemaSiteParser(SiteParser):
+    schema: SiteSchema = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.schema is not None:
+            cls.section_strainer = cls.schema.sections.strainer
+            cls._plan = SchemaPlan(cls)
+
+    @classmethod
+    def parse_data(cls):
+        return list(cls.iter_data())
+
+    # Yields the matches lazily, one section at a time, so they can be consumed while the rest of the sections are extracted
+    # The soup for the whole page is still built up front, this does not lower peak memory
+    @classmethod
+    def iter_data(cls):
+        for section in cls._iter_sections():
+            yield from cls._parse_data(section)
+
+    @classmethod
+    def _iter_sections(cls):
+        with open(cls.file) as fp:
+            soup = cls.make_soup(fp)
+        return cls.schema.sections.find_all(soup)
+
+    @classmethod
+    def _parse_data(cls, section):
+        with metrics.time("section_extraction", site=cls.site):
+            return cls._plan.parse_section(section)
@@ -1,9 +1,10 @@
 import logging
 from unicodedata import category
-from bs4 import BeautifulSoup as bs
 from datetime import datetime
+from bs4 import SoupStrainer
 from objects.match import Match
 from parsers.site_parser import SiteParser
+from metrics.registry import metrics
 
 
 class Site2Parser(SiteParser):
@@ -11,17 +12,34 @@ class Site2Parser(SiteParser):
 
     site = "Site2"
 
+    # Only the match cards are parsed, the rest of the page is never read
+    section_strainer = SoupStrainer(class_="[Class Name]")
+
     @staticmethod
     def parse_data():
+        return list(Site2Parser.iter_data())
+
+    # Yields the matches lazily, one section at a time, so they can be consumed while the rest of the sections are extracted
+    # The soup for the whole page is still built up front, this does not lower peak memory
+    @staticmethod
+    def iter_data():
+        for match in Site2Parser._iter_sections():
+            if parsed_match := Site2Parser._parse_data(match):
+                yield parsed_match
+
+    @staticmethod
+    def _iter_sections():
         with open(Site2Parser.file) as fp:
-            match_list = []
-            soup = bs(fp, "html.parser")
-            for match in soup.find_all(class_="[Class Name]"):
-                if parsed_match := Site2Parser._parse_data(match):
-                    match_list.append(parsed_match)
-        return match_list
+            soup = Site2Parser.make_soup(fp)
+        return soup.find_all(class_="[Class Name]")
 
     @staticmethod
+    def _parse_section(match):
+        parsed_match = Site2Parser._parse_data(match)
+        return [parsed_match] if parsed_match else []
+
+    @staticmethod
+    @metrics.timed("section_extraction", site="Site2")
     def _parse_data(match):
         # Parses out the category
         category = Site2Parser.standardize_category(match.find(class_="[Class Name]"))
@@ -32,28 +50,34 @@ class Site2Parser(SiteParser):
         )
 
         # Parses out the team_names
-        team_names = SiteParser.parse_team_names(
+        team_names = SiteParser.parse_team_names_batch(
             Site2Parser.site,
             category,
-            team_name_soup_=match.find_all("[HTMl Element]", {"class": "[Class Name]"}),
+            SiteParser.clean_soup(
+                match.find_all("[HTMl Element]", {"class": "[Class Name]"})
+            ),
         )
+        team_names = [team_name for team_name in team_names if team_name]
 
         # Parses out the mainline bets
-        bets = SiteParser.parse_bets(
+        bets = SiteParser.parse_bets_batch(
             Site2Parser.site,
             category,
-            bet_soup_=match.find_all("[HTMl Element]", {"class": "[Class Name]"}),
+            SiteParser.clean_soup(
+                match.find_all("[HTMl Element]", {"class": "[Class Name]"})
+            ),
         )
+        bets = [bet for bet in bets if bet]
 
         # Parses out the odds
         odds = {}
 
-        # Bet headers for mainline non moneyline odds
-        bet_headers = SiteParser.parse_bet_headers(
+        # Bet headers for mainline non moneyline odds, None where the header could not be parsed
+        bet_headers = SiteParser.parse_bet_headers_batch(
             Site2Parser.site,
             category,
-            bet_header_soup_=match.find_all(
-                "[HTMl Element]", {"class": "[Class Name]"}
+            SiteParser.clean_soup(
+                match.find_all("[HTMl Element]", {"class": "[Class Name]"})
             ),
         )
 
@@ -64,7 +88,8 @@ class Site2Parser(SiteParser):
         num_of_bets = len(bets)
         money_line_count = 0
         main_odds = SiteParser.odds_conversion(
-            odds_soup_=match.find_all("HTMl Element", {"class": "[Class Name]"})
+            Site2Parser.site,
+            odds_soup_=match.find_all("HTMl Element", {"class": "[Class Name]"}),
         )
         # TODO fix this
         try:
@@ -76,15 +101,14 @@ class Site2Parser(SiteParser):
                         team_names[idx // num_of_bets]
                     ] = main_odd
                     money_line_count += 1
+                elif (bet_header := bet_headers[idx - money_line_count]) is None:
+                    continue
                 elif bets[idx % num_of_bets] == "spread":
                     odds[bets[idx % num_of_bets]][
-                        team_names[idx // num_of_bets]
-                        + bet_headers[idx - money_line_count]
+                        team_names[idx // num_of_bets] + bet_header
                     ] = main_odd
                 else:
-                    odds[bets[idx % num_of_bets]][
-                        bet_headers[idx - money_line_count]
-                    ] = main_odd
+                    odds[bets[idx % num_of_bets]][bet_header] = main_odd
         except IndexError:
             return None
 
@@ -94,6 +118,15 @@ class Site2Parser(SiteParser):
     @staticmethod
     def standardize_datetime(category, date_soup):
         date = SiteParser.parse_date_time(Site2Parser.site, date_soup_=date_soup)
+        return SiteParser.get_date_context().memo(
+            (Site2Parser.site, category, date),
+            Site2Parser._standardize_date_str,
+            category,
+            date,
+        )
+
+    @staticmethod
+    def _standardize_date_str(category, date):
         date = date.replace(category, "")
         date = SiteParser.replace_td_tmr(date)
         date = SiteParser.remove_date_suffixes(date)
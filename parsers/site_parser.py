@@ -1,11 +1,15 @@
-from calendar import weekday
 import re
-import datetime as dt
+import hashlib
 from datetime import datetime
 import logging
 from abc import ABC, abstractmethod
-import time
-from bs4 import ResultSet
+from functools import lru_cache
+import numpy as np
+from bs4 import BeautifulSoup as bs, ResultSet, SoupStrainer
+from bs4.builder import builder_registry
+from parsers.date_context import DateContext
+from parsers.team_name_resolver import TeamNameResolver
+from metrics.registry import metrics
 
 """
 The standard form for spread is +X.X and -X.X
@@ -99,6 +103,87 @@ class SiteParser(ABC):
     def file(self):
         pass
 
+    # Bump when the parsing logic changes so cached snapshots get reparsed
+    # 2: the schema engine keeps odds positions and Site4's last match of each day, Site2 skips unparsed bet headers
+    version = 2
+
+    # BeautifulSoup tree builder for the pasted pages, lxml is C-backed but the tree is still a BeautifulSoup tree
+    # On the synthetic pages (benchmarks/parser_benchmark.py) the soup builds 1.1-1.4x faster than with html.parser
+    # and the whole parse is about as fast to 1.3x faster, extraction on the bs4 tree dominates the rest
+    # Can be overridden per site, falls back to html.parser if lxml is not installed
+    html_backend = "lxml"
+
+    @classmethod
+    def get_html_backend(cls):
+        if builder_registry.lookup(cls.html_backend):
+            return cls.html_backend
+        logging.warning(
+            f"HTML backend {cls.html_backend} not available, using html.parser"
+        )
+        return "html.parser"
+
+    # The regions of the page the parser reads, only these subtrees get built
+    # None builds the whole document
+    section_strainer: SoupStrainer = None
+
+    @classmethod
+    def make_soup(cls, fp):
+        SiteParser.new_date_context()
+        # BeautifulSoup reads the file itself, it is read here first so the two stages are timed separately
+        with metrics.time("file_read", site=cls.site):
+            markup = fp.read() if hasattr(fp, "read") else fp
+        with metrics.time("soup_build", site=cls.site):
+            return bs(markup, cls.get_html_backend(), parse_only=cls.section_strainer)
+
+    # {site: (day, html digest, {section fingerprint: matches}, matches)} from the last parse_changed_data call
+    # Worker processes dont share it, parsers/ingest.py passes each site's state in and back out
+    _sections = {}
+
+    # Parses one section returned by _iter_sections into a list of matches
+    @classmethod
+    def _parse_section(cls, section):
+        return cls._parse_data(section) or []
+
+    # Reparses only the sections whose html changed since the last call
+    # Returns (all matches, matches from changed sections, matches that are gone)
+    # Nothing is parsed if the html and the day are the same as the last call
+    # Every section is reparsed when the day changes, today/tomorrow/weekdays and the year are resolved against the parse day
+    # Without a last call the matches come from the cache if one is given
+    @classmethod
+    def parse_changed_data(cls, cache=None):
+        with open(cls.file, "rb") as fp:
+            digest = hashlib.sha256(fp.read()).hexdigest()
+        day = datetime.today().strftime("%Y%m%d")
+        if (previous := SiteParser._sections.get(cls.site)) is None:
+            if cache is not None:
+                matches = cache.parse(cls)
+                SiteParser._sections[cls.site] = (day, digest, {}, matches)
+                return matches, matches, []
+            previous = (None, None, {}, [])
+        previous_day, previous_digest, previous_sections, previous_matches = previous
+        if previous_day == day and previous_digest == digest:
+            return previous_matches, [], []
+        if previous_day != day:
+            previous_sections = {}
+
+        current = {}
+        changed = []
+        for section in cls._iter_sections():
+            fingerprint = hashlib.sha1(str(section).encode()).hexdigest()
+            if fingerprint in current:
+                continue
+            if fingerprint in previous_sections:
+                current[fingerprint] = previous_sections[fingerprint]
+            else:
+                current[fingerprint] = cls._parse_section(section)
+                changed.extend(current[fingerprint])
+        matches = [match for matches in current.values() for match in matches]
+        # Matches are compared by identity, a reparsed match replaces the old object even if it is equal
+        kept = {id(match) for match in matches}
+        removed = [match for match in previous_matches if id(match) not in kept]
+        SiteParser._sections[cls.site] = (day, digest, current, matches)
+        return matches, changed, removed
+
     @staticmethod
     @abstractmethod
     def convert_date_str(cls, date):
@@ -137,6 +222,17 @@ class SiteParser(ABC):
     def clean_str(str):
         return str.lower().replace("\xa0", " ").strip()
 
+    # Batch calling convention for the parse_*_batch helpers, cleans a soup element or list of them into a list of strs
+    # Unlike clean_and_unpack_soup the result is always a list, even for one element
+    @staticmethod
+    def clean_soup(soup) -> list:
+        if soup is None:
+            return []
+        if not (type(soup) is list or type(soup) is ResultSet):
+            soup = [soup]
+        clean = SiteParser.clean_str
+        return [clean(element.text) for element in soup]
+
     @staticmethod
     def ip_to_american(ip):
         if ip < 0.5:
@@ -144,31 +240,61 @@ class SiteParser(ABC):
         else:
             return f"-{int(round(-((ip))/(ip-1)*100, 0))}"
 
+    AMERICAN_ODDS_RE = re.compile(r"([\-−\+])(\d{3,})")
+    DECIMAL_ODDS_RE = re.compile(r"[1-9]\.\d+")
+
     # Will convert american/decimal odds to implied probability
+    # The site is passed positionally like the other parse_* helpers, it labels the failures
     @clean_and_unpack_soup
     @staticmethod
-    def odds_conversion(odds=None, odds_soup_=None):
-        odds = odds if odds else odds_soup_
-        ip = -1
-        if re.fullmatch(r"[\-−\+]\d{3,}", odds):
-            # Parse out the number
-            num = int(re.search(r"\d+", odds)[0])
+    def odds_conversion(site=None, odds=None, odds_soup_=None):
+        return SiteParser.convert_site_odds(site, odds if odds else odds_soup_)
+
+    # Converts a cleaned odds str, invalid odds are counted and logged against the site
+    # Every conversion path (odds_conversion, odds_conversion_batch and the schema engine) reports failures through here
+    @staticmethod
+    def convert_site_odds(site, odds: str):
+        if (ip := SiteParser.convert_odds(odds)) is None:
+            metrics.inc("parse_failures", kind="odds", site=site or "no site")
+            logging.error(f"Invalid odds input from {site or 'no site'}: {odds}")
+        return ip
+
+    # Undecorated conversion of a cleaned odds str, prices repeat a lot across a page so the results are cached
+    # Returns None for invalid odds
+    @staticmethod
+    @metrics.timed("odds_conversion")
+    @lru_cache(maxsize=4096)
+    def convert_odds(odds: str):
+        if match := SiteParser.AMERICAN_ODDS_RE.fullmatch(odds):
+            sign, num = match.groups()
+            num = int(num)
             # American odds formula
-            ip = (num if "-" in odds or "−" in odds else 100) / (num + 100)
+            ip = (num if sign != "+" else 100) / (num + 100)
             logging.info(
-                f"American odds inputed: {odds} with implied probability = {ip}"
+                "American odds inputed: %s with implied probability = %s", odds, ip
             )
-        elif re.fullmatch(r"[1-9]\.\d+", odds):
+        elif SiteParser.DECIMAL_ODDS_RE.fullmatch(odds):
             # Decimal odds formula
             ip = 1 / float(odds)
             logging.info(
-                f"Decimal odds inputed: {odds} with implied probability = {ip}"
+                "Decimal odds inputed: %s with implied probability = %s", odds, ip
             )
         else:
-            logging.error(f"Invalid odds input: {odds}")
             return None
         return ip
 
+    # Converts a column of odds strs or soup elements in one call
+    # Returns an array of implied probabilities with nan for invalid odds
+    @staticmethod
+    def odds_conversion_batch(odds: list, site=None) -> np.ndarray:
+        convert = SiteParser.convert_site_odds
+        clean = SiteParser.clean_str
+        ips = np.empty(len(odds))
+        for idx, odd in enumerate(odds):
+            ip = convert(site, odd if type(odd) is str else clean(odd.text))
+            ips[idx] = np.nan if ip is None else ip
+        return ips
+
     #################################
     ### METHODS FOR CLEANING BETS ###
     #################################
@@ -212,13 +338,37 @@ class SiteParser(ABC):
     @clean_and_unpack_soup
     @staticmethod
     def parse_bets(site, category, bet=None, bet_soup_=None):
-        bet = bet if bet else bet_soup_
-        if result := SiteParser._parse_bets(category, bet):
-            return result
-        elif result == "":
-            logging.warning(f"Empty bet from {site} in {category}")
-        else:
-            logging.error(f"Error parsing bets from {site} in {category}")
+        if results := SiteParser.parse_bets_batch(
+            site, category, [bet if bet else bet_soup_]
+        ):
+            return results[0]
+
+    # The parse_*_batch helpers return one result per input with None where it could not be parsed
+    # so callers can line the results up with their columns
+    @staticmethod
+    def parse_bets_batch(site, category, bets: list) -> list:
+        results = []
+        for bet in bets:
+            if result := SiteParser._try_parse(
+                site, category, SiteParser._parse_bets, category, bet
+            ):
+                results.append(result)
+                continue
+            if result == "":
+                logging.warning(f"Empty bet from {site} in {category}")
+            else:
+                logging.error(f"Error parsing bets from {site} in {category}")
+            results.append(None)
+        return results
+
+    # Per element version of catch_parsing_error, an exception only loses that element instead of the whole call
+    @staticmethod
+    def _try_parse(site, category, parse, *args, **kwargs):
+        try:
+            return parse(*args, **kwargs)
+        except Exception as err:
+            logging.error(f"Error parsing data from {site} in {category} : {err}")
+            return None
 
     @staticmethod
     def _parse_bets(category, bet):
@@ -252,11 +402,24 @@ class SiteParser(ABC):
     @clean_and_unpack_soup
     @staticmethod
     def parse_bet_headers(site, category, bet_header=None, bet_header_soup_=None):
-        bet_header = bet_header if bet_header else bet_header_soup_
-        if result := SiteParser._parse_bet_headers(category, bet_header):
-            return result
-        else:
-            logging.error(f"Error parsing bet header from {site} in {category}")
+        if results := SiteParser.parse_bet_headers_batch(
+            site, category, [bet_header if bet_header else bet_header_soup_]
+        ):
+            return results[0]
+
+    @staticmethod
+    def parse_bet_headers_batch(site, category, bet_headers: list) -> list:
+        results = []
+        for bet_header in bet_headers:
+            if not (
+                result := SiteParser._try_parse(
+                    site, category, SiteParser._parse_bet_headers, category, bet_header
+                )
+            ):
+                logging.error(f"Error parsing bet header from {site} in {category}")
+                result = None
+            results.append(result)
+        return results
 
     @staticmethod
     def _parse_bet_headers(category, bet_header):
@@ -287,15 +450,47 @@ class SiteParser(ABC):
     #######################################
 
     ncaaf_team_name_dict = {}
+    ncaaf_team_name_resolver: TeamNameResolver = None
+
+    # Built once from the merged ncaaf dicts and saved so later runs only load it
+    @staticmethod
+    def get_ncaaf_resolver() -> TeamNameResolver:
+        if SiteParser.ncaaf_team_name_resolver is None:
+            if not SiteParser.ncaaf_team_name_dict:
+                SiteParser._intialize_ncaaf_dict()
+            SiteParser.ncaaf_team_name_resolver = TeamNameResolver.load_or_build(
+                SiteParser.ncaaf_team_name_dict, name="ncaaf_team_names"
+            )
+        return SiteParser.ncaaf_team_name_resolver
 
     @clean_and_unpack_soup
     @staticmethod
     def parse_team_names(site, category, team_name=None, team_name_soup_=None):
-        team_name = team_name if team_name else team_name_soup_
-        if result := SiteParser._parse_team_names(category, team_name, site=site):
-            return result
-        else:
-            logging.error(f"Error parsing team names from {site} in {category}")
+        if results := SiteParser.parse_team_names_batch(
+            site, category, [team_name if team_name else team_name_soup_]
+        ):
+            return results[0]
+
+    @staticmethod
+    def parse_team_names_batch(site, category, team_names: list) -> list:
+        results = []
+        with metrics.time("team_resolution", site=site):
+            for team_name in team_names:
+                if not (
+                    result := SiteParser._try_parse(
+                        site,
+                        category,
+                        SiteParser._parse_team_names,
+                        category,
+                        team_name,
+                        site,
+                    )
+                ):
+                    metrics.inc("parse_failures", kind="team_name", site=site)
+                    logging.error(f"Error parsing team names from {site} in {category}")
+                    result = None
+                results.append(result)
+        return results
 
     @staticmethod
     def _parse_team_names(category, team_name, site=None):
@@ -309,33 +504,13 @@ class SiteParser(ABC):
         elif category == "nfl":
             return SiteParser._nfl_parse_team_names(team_name)
         elif category == "ncaaf":
-            if not SiteParser.ncaaf_team_name_dict:
-                SiteParser._intialize_ncaaf_dict()
-            if team_name in SiteParser.ncaaf_team_name_dict:
-                return SiteParser.ncaaf_team_name_dict[team_name]
-            else:
-                vals = SiteParser.ncaaf_team_name_dict.values()
-                if team_name in vals:
-                    print(f'"{team_name}" : "{team_name}",')
-                    return team_name
-                for key, value in SiteParser.ncaaf_team_name_dict.items():
-                    for tn in [
-                        team_name,
-                        team_name.split(" ", 1)[0],
-                        team_name.rsplit(" ", 1)[0],
-                    ]:
-                        if value.find(team_name) != -1:
-                            print(f"Potential Match: {value} contains {tn}")
-                            print(f'"{team_name}" : "{value}",')
-                        elif key.find(team_name) != -1:
-                            print(f"Potential Match: {key} contains {tn}")
-                            print(f'"{team_name}" : "{value}",')
-
-                print(f'"{team_name}" : "",')
-                print(f'"{team_name}" : "{team_name}",')
-                print(team_name)
-                logging.error(f"Team name '{team_name}' not found in ncaaf dict")
-                return None
+            resolver = SiteParser.get_ncaaf_resolver()
+            if result := resolver.resolve(team_name):
+                return result
+            logging.error(
+                f"Team name '{team_name}' not found in ncaaf dict, closest: {resolver.candidates(team_name)}"
+            )
+            return None
         else:
             logging.error(f"{category} not supported for team name parsing")
             return None
@@ -356,29 +531,34 @@ class SiteParser(ABC):
     ### METHODS FOR CLEANING DATES ###
     ##################################
 
-    DATE_SUFFIXES = ["rd", "st", "nd", "th"]
+    DATE_SUFFIXES = DateContext.DATE_SUFFIXES
+
+    # Today, tomorrow and the year are looked up once per parse run, a new page starts a new run
+    date_context: DateContext = None
+
+    @staticmethod
+    def new_date_context() -> DateContext:
+        SiteParser.date_context = DateContext()
+        return SiteParser.date_context
+
+    @staticmethod
+    def get_date_context() -> DateContext:
+        if SiteParser.date_context is None:
+            return SiteParser.new_date_context()
+        return SiteParser.date_context
 
     @staticmethod
     # Replaces today and tommorow with the correct date
     def replace_td_tmr(date):
-        # Standardizes the date format
-        date = date.replace("today", datetime.today().strftime("%a %b %d"))
-        date = date.replace(
-            "tomorrow", (datetime.today() + dt.timedelta(days=1)).strftime("%a %b %d")
-        )
-        return date
+        return SiteParser.get_date_context().replace_td_tmr(date)
 
     @staticmethod
     def remove_date_suffixes(date):
-        for suffix in SiteParser.DATE_SUFFIXES:
-            number = re.search(rf"(\d+){suffix}", date)
-            if number:
-                date = re.sub(rf"(\d+){suffix}", number.group(1), date)
-        return date
+        return SiteParser.get_date_context().remove_date_suffixes(date)
 
     @staticmethod
     def append_year(date):
-        return date + datetime.today().strftime(" %Y")
+        return SiteParser.get_date_context().append_year(date)
 
     @staticmethod
     def remove_at_symbol(date):
@@ -399,18 +579,7 @@ class SiteParser(ABC):
     @staticmethod
     # Gets the numerical day from the name of the day of the week
     def get_date_from_day(date):
-        todays_day = datetime.today().weekday()
-        split_input = date.split(" ", 1)
-        other_day = time.strptime(split_input[0], "%a").tm_wday
-        if todays_day > other_day:
-            delta = (other_day + 7) - todays_day
-        else:
-            delta = other_day - todays_day
-        return (
-            (datetime.today() + dt.timedelta(days=delta)).strftime("%a %b %d")
-            + " "
-            + split_input[1]
-        )
+        return SiteParser.get_date_context().get_date_from_day(date)
 
     # Bandaid fix for ncaaf team names, if no teams have overlaps no need to put them into site specific dictionaries :)
     @staticmethod
@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+
+# Resolves a site's team name to the standard name without scanning the whole team dict
+# exact {name: standard name} for every key and standard name, the only names that resolve
+# prefixes {leading words: set of standard names} ex. "western", "western carolina"
+# tokens {word: set of standard names}
+# The prefixes and tokens only rank candidates(), partial names like "penn" are never guessed since they can be a different school
+class TeamNameResolver:
+    # Bump when the index changes so pickles built by older code are not loaded
+    version = 3
+
+    def __init__(self, names: dict) -> None:
+        self._names = dict(names)
+        self._exact = {}
+        self._prefixes = {}
+        self._tokens = {}
+        for key, value in self._names.items():
+            self._exact[key] = value
+        # A standard name that is also a key keeps the key's mapping
+        for value in self._names.values():
+            self._exact.setdefault(value, value)
+        for name, value in self._exact.items():
+            words = name.split()
+            for idx in range(1, len(words) + 1):
+                self._prefixes.setdefault(" ".join(words[:idx]), set()).add(value)
+            for word in words:
+                self._tokens.setdefault(word, set()).add(value)
+
+    @property
+    def names(self) -> dict:
+        return self._names
+
+    # Returns the standard name, None if the name is not in the dict, see candidates for the likely matches
+    def resolve(self, team_name: str) -> str:
+        return self._exact.get(team_name)
+
+    # Returns up to n standard names ranked by how much of the name they share, best first
+    def candidates(self, team_name: str, n=5) -> list:
+        scores = {}
+        words = team_name.split()
+        # Longer shared leading words rank higher
+        for idx in range(len(words), 0, -1):
+            for value in self._prefixes.get(" ".join(words[:idx]), ()):
+                scores[value] = scores.get(value, 0) + idx
+        # Rare words count for more than ones like "state"
+        for word in set(words):
+            if values := self._tokens.get(word):
+                for value in values:
+                    scores[value] = scores.get(value, 0) + 1 / len(values)
+        return sorted(scores, key=lambda value: (-scores[value], value))[:n]
+
+    @staticmethod
+    def _get_digest(names: dict) -> str:
+        return hashlib.sha256(repr(sorted(names.items())).encode()).hexdigest()
+
+    # Loads the resolver built for the same names from the directory, otherwise builds and saves it
+    @staticmethod
+    def load_or_build(names: dict, name="team_names", directory=".parse_cache"):
+        path = os.path.join(
+            directory,
+            f"{name}_v{TeamNameResolver.version}_{TeamNameResolver._get_digest(names)}.pickle",
+        )
+        try:
+            with open(path, "rb") as fp:
+                return pickle.load(fp)
+        except FileNotFoundError:
+            pass
+        except Exception as err:
+            logging.warning(f"Ignoring unreadable team name index {path}: {err}")
+        resolver = TeamNameResolver(names)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Written to a temp file first so another process never loads a partial index
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fp:
+                    pickle.dump(resolver, fp, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            # Only the index for the current names is kept
+            for file in os.listdir(directory):
+                if file.startswith(f"{name}_") and file != os.path.basename(path):
+                    os.remove(os.path.join(directory, file))
+        except OSError as err:
+            logging.warning(f"Could not save team name index {path}: {err}")
+        return resolver
@@ -1,11 +1,17 @@
 from heapq import heappop
+import time
 from parsers.site_5_parser import Site5Parser
 from parsers.site_2_parser import Site2Parser
 from parsers.site_4_parser import Site4Parser
 from parsers.site_1_parser import Site1Parser
 from parsers.site_3_parser import Site3Parser
 from parsers.site_6_parser import Site6Parser
+from parsers.ingest import parse_site_changes
+from parsers.parse_cache import ParseCache
 from comparators.bet_comparator import BetComparer
+from objects.match_index import MatchIndex
+from metrics.registry import metrics
+from metrics.exposition import MetricsServer
 from objects.bets import (
     NormalBet,
     BonusRules,
@@ -17,26 +23,36 @@ from objects.bets import (
 )
 
 
-if __name__ == "__main__":
-    site_1 = Site1Parser()
-    site_1_parsed = site_1.parse_data()
-    site_2 = Site2Parser()
-    site_2_parsed = site_2.parse_data()
-    site_3 = Site3Parser()
-    site_3_parsed = site_3.parse_data()
-    site_4 = Site4Parser()
-    site_4_parsed = site_4.parse_data()
-    site_5 = Site5Parser()
-    site_5_parsed = site_5.parse_data()
-    site_6 = Site6Parser()
-    site_6_parsed = site_6.parse_data()
-
-    bet_comparer = BetComparer()
-
-    for x in [site_1_parsed, site_2_parsed]:
-        for y in x:
-            bet_comparer.add_match(y)
-    for bet, site in {
+# Parses every site and prints the best hedges for each promotion
+# The comparer and the section state are kept between sweeps so only the matches from changed sections are reindexed
+def sweep(bet_comparer: BetComparer, sections: dict, cache: ParseCache):
+    # Every site is parsed in its own process, only the sections whose html changed since the last sweep are reparsed
+    # The first sweep loads sites with unchanged html from the cache
+    parsers = [
+        Site1Parser,
+        Site2Parser,
+        Site3Parser,
+        Site4Parser,
+        Site5Parser,
+        Site6Parser,
+    ]
+    parsed, changes, timings = parse_site_changes(parsers, sections, cache=cache)
+    (
+        site_1_parsed,
+        site_2_parsed,
+        site_3_parsed,
+        site_4_parsed,
+        site_5_parsed,
+        site_6_parsed,
+    ) = (parsed[parser] for parser in parsers)
+
+    # Only the best hedges for each bet are kept and printed
+    num_returned = 10
+
+    # Only the matches from changed sections (and the ones that are gone) touch the comparer
+    for parser in parsers:
+        bet_comparer.update_matches(*changes[parser])
+    promotions = {
         NormalBet(bet=5000): site_1_parsed,
         NormalBet(
             bet=5000, bonus=BonusRules(bonus=1.0 / 6.0, min_odds="-200")
@@ -44,9 +60,46 @@ if __name__ == "__main__":
         FreeBet(bet=600, amount_free=600): site_2_parsed,
         ProfitBoostBet(250, profit_boost=ProfitBoostRules(250, bonus=1)): site_3_parsed,
         InsuredBet(bet=1000, amount_insured=1000): site_4_parsed,
-    }.items():
-        val = bet_comparer._get_best_given_matches(bet, site)
+    }
+
+    # The promotions are independent so they are evaluated in parallel
+    for val in bet_comparer._get_best_given_promotions(
+        list(promotions.items()), num_returned=num_returned
+    ):
         while val:
             x = heappop(val)
             print(x[1])
-        pass
+
+    # Pure arbitrages dont need a promo, every market on every site is checked
+    val = bet_comparer._get_arbitrages(num_returned=num_returned)
+    while val:
+        x = heappop(val)
+        print(x[1])
+
+
+if __name__ == "__main__":
+    # Set to True to print where the run's time went at the end, see metrics/registry.py
+    collect_metrics = False
+    # Serves the metrics on http://127.0.0.1:[metrics_port]/metrics in Prometheus text format, None turns it off
+    metrics_port = None
+    # Seconds between sweeps, None runs a single sweep
+    sweep_interval = None
+    metrics.enable(collect_metrics or metrics_port is not None)
+    if metrics_port is not None:
+        MetricsServer(port=metrics_port).start()
+
+    # Sites dont always agree on kickoff times so games within the tolerance are treated as the same game
+    bet_comparer = BetComparer(match_index=MatchIndex())
+    # {site: section state} from the last sweep, see SiteParser.parse_changed_data
+    sections = {}
+    cache = ParseCache()
+    while True:
+        with metrics.time("sweep"):
+            sweep(bet_comparer, sections, cache)
+        metrics.inc("sweeps")
+        if sweep_interval is None:
+            break
+        time.sleep(sweep_interval)
+
+    if collect_metrics:
+        print(metrics.report())